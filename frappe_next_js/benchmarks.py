@@ -0,0 +1,123 @@
+"""Micro-benchmarks for SPA serving.
+
+Run against a site with an exported frontend:
+
+	bench --site mysite execute frappe_next_js.benchmarks.spa_syscalls --kwargs "{'path': '/frontend/orders/123'}"
+"""
+
+import builtins
+import mimetypes
+import os
+import time
+from contextlib import contextmanager
+
+from werkzeug.wrappers import Response
+
+import frappe
+from frappe.utils import set_request
+
+from frappe_next_js.spa_page import SPAPage
+
+
+class LegacySPAPage:
+	"""SPAPage as it was before the file manifest: probes every installed app on each call."""
+
+	def __init__(self, path, http_status_code=None):
+		self.path = path
+
+	def _get_spa_root(self):
+		return self.path.split("/")[0] if self.path else ""
+
+	def can_render(self):
+		if not self.path:
+			return False
+		spa_root = self._get_spa_root()
+		request_path = (frappe.local.request.path or "").strip("/")
+		if not request_path.startswith(spa_root):
+			return False
+		for app in frappe.get_installed_apps():
+			if os.path.isfile(frappe.get_app_path(app, "www", spa_root, "index.html")):
+				return True
+		return False
+
+	def _find_file(self, request_path):
+		for app in frappe.get_installed_apps():
+			www_base = frappe.get_app_path(app, "www")
+			file_path = os.path.normpath(os.path.join(www_base, *request_path.split("/")))
+			if not file_path.startswith(www_base) or file_path.endswith(".py"):
+				continue
+			if os.path.isfile(file_path):
+				return file_path
+			index_in_dir = os.path.join(file_path, "index.html")
+			if os.path.isfile(index_in_dir):
+				return index_in_dir
+		return None
+
+	def render(self):
+		request_path = (frappe.local.request.path or "").strip("/")
+		spa_root = self._get_spa_root()
+		if not request_path or request_path.rstrip("/") == spa_root:
+			request_path = f"{spa_root}/index.html"
+		file_path = self._find_file(request_path)
+		if file_path:
+			with open(file_path, "rb") as f:
+				return Response(f.read(), mimetype=mimetypes.guess_type(file_path)[0] or "text/html")
+		for app in frappe.get_installed_apps():
+			index_path = frappe.get_app_path(app, "www", spa_root, "index.html")
+			if os.path.isfile(index_path):
+				with open(index_path, "rb") as f:
+					return Response(f.read(), mimetype="text/html")
+		return Response("Not Found", status=404)
+
+
+@contextmanager
+def count_syscalls(counts):
+	"""Count stat and open calls (os.path.isfile/exists go through os.stat)."""
+	original_stat, original_open = os.stat, builtins.open
+
+	def stat(*args, **kwargs):
+		counts["stat"] += 1
+		return original_stat(*args, **kwargs)
+
+	def open_(*args, **kwargs):
+		counts["open"] += 1
+		return original_open(*args, **kwargs)
+
+	os.stat, builtins.open = stat, open_
+	try:
+		yield counts
+	finally:
+		os.stat, builtins.open = original_stat, original_open
+
+
+def measure(renderer, path, iterations):
+	spa_root = path.strip("/").split("/")[0]
+	counts = {"stat": 0, "open": 0}
+	set_request(method="GET", path=path)
+	# Warm up per-worker state (manifest, content cache) outside the measurement
+	page = renderer(spa_root)
+	page.can_render() and page.render()
+
+	start = time.perf_counter()
+	with count_syscalls(counts):
+		for _ in range(iterations):
+			page = renderer(spa_root)
+			if page.can_render():
+				page.render()
+	elapsed = time.perf_counter() - start
+	return {
+		"stat": counts["stat"] / iterations,
+		"open": counts["open"] / iterations,
+		"us": elapsed / iterations * 1e6,
+	}
+
+
+def spa_syscalls(path="/frontend/", iterations=1000):
+	"""Print stat/open calls and time per request for the legacy and current SPAPage."""
+	rows = []
+	for label, renderer in (("before", LegacySPAPage), ("after", SPAPage)):
+		result = measure(renderer, path, iterations)
+		rows.append(f"{label:<8}{result['stat']:>8.1f}{result['open']:>8.1f}{result['us']:>12.1f}")
+	print(f"{len(frappe.get_installed_apps())} installed apps, {iterations} requests for {path}")
+	print(f"{'':<8}{'stat':>8}{'open':>8}{'us/req':>12}")
+	print("\n".join(rows))
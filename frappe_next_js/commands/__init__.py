@@ -1,6 +1,12 @@
 import click
+import os
 
+from .bundle_analyzer import NextJSBundleAnalyzer
 from .nextjs_generator import NextJSGenerator
+from .nextjs_builder import NextJSBuilder
+from .nextjs_exporter import NextJSExporter
+from .nextjs_watcher import NextJSWatcher
+from .releases import DEFAULT_KEEP_RELEASES
 
 
 @click.command("add-nextjs")
@@ -45,4 +51,134 @@ def add_nextjs(name, app, typescript, tailwindcss, site):
     generator.generate_nextjs()
 
 
-commands = [add_nextjs]
+@click.command("nextjs-export")
+@click.option("--app", required=True, help="Name of the Frappe app the frontend belongs to")
+@click.option("--name", default="frontend", help="Name of the Next.js frontend directory")
+@click.option(
+    "--keep-releases",
+    default=DEFAULT_KEEP_RELEASES,
+    show_default=True,
+    help="Number of releases to keep for rollback",
+)
+def nextjs_export(app, name, keep_releases):
+    """Deploy a Next.js export for serving by Frappe.
+
+    Run after `next build`. Stages <name>/out as a new release in
+    www/.releases/<name>/<build id> (hardlinking files unchanged since the
+    last release), copies new chunks to public/<name>/_next, writes the file
+    manifest and build stamp that SPAPage loads instead of probing the
+    filesystem on every request, and then points the www/<name> symlink at
+    the new release.
+
+    Example:
+        bench nextjs-export --app my_app --name frontend
+    """
+    exporter = NextJSExporter(app=app, spa_name=name)
+    exporter.export(keep_releases=keep_releases)
+
+
+@click.command("nextjs-rollback")
+@click.option("--app", required=True, help="Name of the Frappe app the frontend belongs to")
+@click.option("--name", default="frontend", help="Name of the Next.js frontend directory")
+@click.option("--to", "release", default=None, help="Release to activate (default: the one before the current)")
+def nextjs_rollback(app, name, release):
+    """Switch a frontend back to an earlier release kept by nextjs-export.
+
+    Example:
+        bench nextjs-rollback --app my_app --name frontend
+    """
+    exporter = NextJSExporter(app=app, spa_name=name)
+    exporter.rollback(release)
+
+
+@click.command("nextjs-watch")
+@click.option("--app", required=True, help="Name of the Frappe app the frontend belongs to")
+@click.option("--name", default="frontend", help="Name of the Next.js frontend directory")
+@click.option("--build/--no-build", default=True, help="Run next build when sources change (else only watch out/)")
+def nextjs_watch(app, name, build):
+    """Keep the Frappe-served export of a frontend in sync while developing.
+
+    Reruns next build when src/, public/ or the config changes, and copies
+    only the files of out/ whose content changed into the live export and
+    public/<name>/_next, then stamps a new build so SPAPage reloads it.
+    Meant for testing through Frappe (routing, boot data, CSRF); use
+    next dev for UI work.
+
+    Example:
+        bench nextjs-watch --app my_app --name frontend
+    """
+    watcher = NextJSWatcher(app=app, spa_name=name, build=build)
+    watcher.watch()
+
+
+@click.command("build-nextjs")
+@click.option("--app", "apps", multiple=True, help="Only build frontends of this app (repeatable)")
+@click.option("--jobs", type=int, default=None, help="Concurrent builds (default: from CPU cores and free memory)")
+@click.option("--install/--no-install", default=True, help="Run npm install before building")
+@click.option("--force", is_flag=True, default=False, help="Rebuild even if the sources are unchanged")
+def build_nextjs(apps, jobs, install, force):
+    """Build every Next.js frontend on the bench in parallel.
+
+    Finds each frontend created by add-nextjs, runs npm install and
+    build:frappe for several at once with output prefixed by app/frontend,
+    and reports the wall time of each build. Frontends whose sources,
+    config, lockfile and NEXT_PUBLIC_* environment are unchanged reuse
+    their cached build (see --force).
+
+    Example:
+        bench build-nextjs
+        bench build-nextjs --app my_app --jobs 2
+    """
+    builder = NextJSBuilder(apps=list(apps), jobs=jobs, install=install, force=force)
+    results = builder.build()
+    if any(result["returncode"] for result in results):
+        exit(1)
+
+
+@click.command("nextjs-bundle-size")
+@click.option("--app", required=True, help="Name of the Frappe app the frontend belongs to")
+@click.option("--name", default="frontend", help="Name of the Next.js frontend directory")
+@click.option("--budget", type=float, default=None, help="Default first-load JS budget per route, in KB gzipped")
+@click.option("--save/--no-save", default=True, help="Record this build in bundle-history.json")
+def nextjs_bundle_size(app, name, budget, save):
+    """Report first-load JS/CSS sizes per route of the last build.
+
+    Reads the .next build manifests, measures each route's first-load
+    chunks raw, gzipped and brotli-compressed, shows the change since the
+    previous build in bundle-history.json, and fails if a route exceeds
+    its budget in bundle-budgets.json (or --budget).
+
+    Example:
+        bench nextjs-bundle-size --app my_app --name frontend --budget 200
+    """
+    analyzer = NextJSBundleAnalyzer(app=app, spa_name=name)
+    if analyzer.run(budget=budget, save=save):
+        exit(1)
+
+
+@click.command("nextjs-nginx-conf")
+@click.option("--prefix", default="/nextjs-internal", help="Internal location SPAPage redirects to")
+def nextjs_nginx_conf(prefix):
+    """Print nginx location blocks for Next.js frontends.
+
+    Serves content-hashed /_next/static chunks with immutable caching, and
+    adds the internal location for X-Accel-Redirect. Enable offloading by setting nextjs_sendfile to "x-accel-redirect" in
+    site config (and nextjs_accel_prefix if you change --prefix).
+
+    Example:
+        bench nextjs-nginx-conf
+    """
+    from .boilerplates import NGINX_ACCEL_CONF
+
+    context = {
+        "accel_prefix": prefix.rstrip("/"),
+        "apps_path": os.path.abspath(os.path.join("..", "apps")),
+        "sites_path": os.path.abspath("."),
+    }
+    content = NGINX_ACCEL_CONF
+    for key, value in context.items():
+        content = content.replace("{{ " + key + " }}", value)
+    click.echo(content)
+
+
+commands = [add_nextjs, nextjs_export, nextjs_rollback, nextjs_watch, build_nextjs, nextjs_bundle_size, nextjs_nginx_conf]
@@ -12,7 +12,8 @@ NEXTJS_PACKAGE_JSON = """{
     "dev": "next dev --turbopack -p 3000",
     "build": "next build",
     "build:frappe": "next build && npm run export-assets",
-    "export-assets": "rm -rf ../{{ app_package }}/www/{{ spa_name }} ../{{ app_package }}/public/{{ spa_name }} && mkdir -p ../{{ app_package }}/www/{{ spa_name }} ../{{ app_package }}/public/{{ spa_name }} && cp -r out/* ../{{ app_package }}/www/{{ spa_name }}/ && mv ../{{ app_package }}/www/{{ spa_name }}/_next ../{{ app_package }}/public/{{ spa_name }}/_next",
+    "export-assets": "cd ../../.. && bench nextjs-export --app {{ app_name }} --name {{ spa_name }}",
+    "bundle-size": "cd ../../.. && bench nextjs-bundle-size --app {{ app_name }} --name {{ spa_name }}",
     "start": "next start",
     "lint": "next lint"
   },
@@ -56,7 +57,8 @@ NEXTJS_PACKAGE_JSON_JS = """{
     "dev": "next dev --turbopack -p 3000",
     "build": "next build",
     "build:frappe": "next build && npm run export-assets",
-    "export-assets": "rm -rf ../{{ app_package }}/www/{{ spa_name }} ../{{ app_package }}/public/{{ spa_name }} && mkdir -p ../{{ app_package }}/www/{{ spa_name }} ../{{ app_package }}/public/{{ spa_name }} && cp -r out/* ../{{ app_package }}/www/{{ spa_name }}/ && mv ../{{ app_package }}/www/{{ spa_name }}/_next ../{{ app_package }}/public/{{ spa_name }}/_next",
+    "export-assets": "cd ../../.. && bench nextjs-export --app {{ app_name }} --name {{ spa_name }}",
+    "bundle-size": "cd ../../.. && bench nextjs-bundle-size --app {{ app_name }} --name {{ spa_name }}",
     "start": "next start",
     "lint": "next lint"
   },
@@ -90,6 +92,7 @@ NEXTJS_PACKAGE_JSON_JS = """{
 # next.config.js template (unified: dev + production)
 # - Dev: basePath empty so / works; rewrites proxy API to Frappe
 # - Prod: basePath for Frappe; rewrites disabled (output: export incompatible)
+# - No headers(): ignored with output: export - SPAPage and nginx set Cache-Control instead
 NEXTJS_CONFIG = """/** @type {import('next').NextConfig} */
 const isDev = process.env.NODE_ENV === 'development';
 const frappeUrl = process.env.FRAPPE_URL || 'http://{{ site_name }}:{{ webserver_port }}';
@@ -97,7 +100,8 @@ const nextConfig = {
   reactStrictMode: true,
   output: 'export',
   trailingSlash: true,
-  images: { unoptimized: true },
+  // nextjs-export writes resized WebP/AVIF copies of exported images; the loader points next/image at them
+  images: { loader: 'custom', loaderFile: './src/lib/image-loader.js' },
   basePath: isDev ? '' : '/{{ spa_name }}',
   assetPrefix: isDev ? undefined : '/assets/{{ app_package }}/{{ spa_name }}/',
   experimental: {
@@ -111,16 +115,6 @@ const nextConfig = {
       '@radix-ui/react-slot',
     ],
   },
-  async headers() {
-    return [
-      {
-        source: '/_next/static/:path*',
-        headers: [
-          { key: 'Cache-Control', value: 'public, max-age=31536000, immutable' },
-        ],
-      },
-    ];
-  },
   ...(isDev && {
     async rewrites() {
       return [
@@ -136,6 +130,46 @@ const nextConfig = {
 module.exports = nextConfig;
 """
 
+# next/image loader for the static export (plain JS, so TypeScript and JavaScript projects share it)
+NEXTJS_IMAGE_LOADER = """// Static export has no image optimizer, so nextjs-export writes resized copies of every
+// PNG/JPEG/WebP image at next/image's default widths, next to the original:
+//   /{{ spa_name }}/images/hero.png -> /{{ spa_name }}/images/_img/640/hero.png.webp
+// Only images exported with this frontend have variants; uploads, other apps' assets,
+// remote images and everything in development are served as-is.
+const isDev = process.env.NODE_ENV === 'development';
+const basePath = isDev ? '' : '/{{ spa_name }}';
+const assetPrefix = '/assets/{{ app_package }}/{{ spa_name }}/';
+const OPTIMIZED = /\\.(png|jpe?g|webp)$/i;
+const FRAPPE_PATHS = /^\\/(files|private|api|assets|app)\\//;
+
+function exportedPath(src) {
+  if (isDev || !OPTIMIZED.test(src)) return null;
+  // Static imports carry the asset prefix; public files may be written with or without the basePath
+  if (src.startsWith(assetPrefix) || src.startsWith(`${basePath}/`)) return src;
+  if (src.startsWith('/') && !src.startsWith('//') && !FRAPPE_PATHS.test(src)) return `${basePath}${src}`;
+  return null;
+}
+
+function variantUrl(src, width, format) {
+  const path = exportedPath(src);
+  if (!path) {
+    return `${src}${src.includes('?') ? '&' : '?'}w=${width}`;
+  }
+  const slash = path.lastIndexOf('/');
+  return `${path.slice(0, slash)}/_img/${width}/${path.slice(slash + 1)}.${format}`;
+}
+
+export default function imageLoader({ src, width }) {
+  return variantUrl(src, width, 'webp');
+}
+
+// For <picture><source type="image/avif">: getImageProps({ ...props, loader: avifLoader })
+// Needs a Pillow with AVIF support on the server that runs nextjs-export
+export function avifLoader({ src, width }) {
+  return variantUrl(src, width, 'avif');
+}
+"""
+
 # next.config.js for development (with rewrites) - alias for backward compat
 NEXTJS_CONFIG_DEV = NEXTJS_CONFIG
 
@@ -304,13 +338,13 @@ function AppNotInstalled() {
 }
 
 export default function Home() {
-  const { user, isLoggedIn, logout, authLoading } = useFrappe();
+  const { boot, user, isLoggedIn, logout, authLoading } = useFrappe();
   const { toast } = useToast();
 
   const systemSettings = useResource({
     method: '{{ app_package }}.api.check_backend',
     params: {},
-    auto: true,
+    auto: !boot,
   });
 
   const isNotInstalled = systemSettings.error?.message?.includes('not installed');
@@ -422,13 +456,13 @@ function AppNotInstalled() {
 }
 
 export default function Home() {
-  const { user, isLoggedIn, logout, authLoading } = useFrappe();
+  const { boot, user, isLoggedIn, logout, authLoading } = useFrappe();
   const { toast } = useToast();
 
   const systemSettings = useResource({
     method: '{{ app_package }}.api.check_backend',
     params: {},
-    auto: true,
+    auto: !boot,
   });
 
   const isNotInstalled = systemSettings.error?.message?.includes('not installed');
@@ -599,8 +633,20 @@ interface DocResourceOptions {
 const FRAPPE_URL = '';
 const API = '{{ app_package }}.api';
 
+// Session data injected into the HTML shell by SPAPage (saves the get_logged_user/get_csrf_token/check_backend round trips)
+export interface FrappeBoot {
+  user: string;
+  csrf_token: string | null;
+  roles: string[];
+  lang: string;
+  setup_complete: boolean | null;
+}
+
+export const boot: FrappeBoot | null =
+  typeof window !== 'undefined' ? (window as any).__FRAPPE_BOOT__ ?? null : null;
+
 let _authToken: string | null = null;
-let _csrfToken: string | null = null;
+let _csrfToken: string | null = boot?.csrf_token ?? null;
 
 function setAuthToken(token: string | null) {
   _authToken = token;
@@ -900,6 +946,7 @@ export function useDocResource<T = any>(options: DocResourceOptions) {
 
 interface FrappeContextType {
   call: typeof call;
+  boot: FrappeBoot | null;
   user: string | null;
   isLoggedIn: boolean;
   authLoading: boolean;
@@ -981,6 +1028,11 @@ export function FrappeProvider({ children }: { children: ReactNode }) {
   }, []);
 
   useEffect(() => {
+    if (boot) {
+      setUser(boot.user !== 'Guest' ? boot.user : null);
+      setAuthLoading(false);
+      return;
+    }
     refreshUser();
   }, [refreshUser]);
 
@@ -989,6 +1041,7 @@ export function FrappeProvider({ children }: { children: ReactNode }) {
   const value = useMemo<FrappeContextType>(
     () => ({
       call,
+      boot,
       user,
       isLoggedIn,
       authLoading,
@@ -1022,8 +1075,11 @@ import { createContext, useContext, useState, useEffect, useCallback, useMemo }
 const FRAPPE_URL = '';
 const API = '{{ app_package }}.api';
 
+// Session data injected into the HTML shell by SPAPage: { user, csrf_token, roles, lang, setup_complete }
+export const boot = typeof window !== 'undefined' ? window.__FRAPPE_BOOT__ ?? null : null;
+
 let _authToken = null;
-let _csrfToken = null;
+let _csrfToken = boot?.csrf_token ?? null;
 
 function setAuthToken(token) {
   _authToken = token;
@@ -1367,13 +1423,18 @@ export function FrappeProvider({ children }) {
   }, []);
 
   useEffect(() => {
+    if (boot) {
+      setUser(boot.user !== 'Guest' ? boot.user : null);
+      setAuthLoading(false);
+      return;
+    }
     refreshUser();
   }, [refreshUser]);
 
   const isLoggedIn = !!user && user !== 'Guest';
 
   const value = useMemo(
-    () => ({ call, user, isLoggedIn, authLoading, serverUp, login, logout, refreshUser }),
+    () => ({ call, boot, user, isLoggedIn, authLoading, serverUp, login, logout, refreshUser }),
     [user, isLoggedIn, authLoading, serverUp, login, logout, refreshUser]
   );
 
@@ -1724,7 +1785,7 @@ NEXTJS_APP_PACKAGE_JSON = """{
     "test": "echo \\"Error: no test specified\\" && exit 1",
     "postinstall": "cd {{ spa_name }} && npm install",
     "dev": "cd {{ spa_name }} && npm run dev",
-    "build": "cd {{ spa_name }} && npm install && npm run build:frappe"
+    "build": "cd ../.. && bench build-nextjs --app {{ app_name }}"
   },
   "keywords": [],
   "author": "",
@@ -1739,11 +1800,57 @@ NEXTJS_FRAPPE_PROVIDER_JS = NEXTJS_FRAPPE_LIB_JS
 
 # Page controller for serving Next.js HTML without Jinja (fallback when SPAPage is unavailable)
 SPA_PAGE_PY = """import frappe
+import json
 import os
+import re
 
 no_cache = 1
 
-ASSET_PREFIX = "/assets/{{ app_package }}/{{ spa_name }}"
+# html path → (mtime_ns, html, boot script offset)
+_html_cache = {}
+
+# The boot script goes right after <head>, ahead of the async chunks that read it on load
+_HEAD_TAG = re.compile(r"<head(?:\\s[^>]*)?>", re.IGNORECASE)
+
+
+def get_boot_script():
+\t\"\"\"window.__FRAPPE_BOOT__ for lib/frappe - saves the get_logged_user/get_csrf_token/check_backend calls.\"\"\"
+\tfrom frappe.sessions import get_csrf_token
+
+\ttry:
+\t\tsetup_complete = bool(frappe.db.get_single_value("System Settings", "setup_complete"))
+\texcept Exception:
+\t\tsetup_complete = None
+\tuser = frappe.session.user
+\tboot = {
+\t\t"user": user,
+\t\t# Guest sessions are not persisted, so a token would be new on every request (and is not checked)
+\t\t"csrf_token": None if user == "Guest" else get_csrf_token(),
+\t\t"roles": frappe.get_roles(),
+\t\t"lang": frappe.local.lang,
+\t\t"setup_complete": setup_complete,
+\t}
+\tpayload = json.dumps(boot, separators=(",", ":"), default=str)
+\tpayload = payload.replace("<", "\\\\u003c").replace(">", "\\\\u003e").replace("&", "\\\\u0026")
+\treturn f"<script>window.__FRAPPE_BOOT__={payload};</script>"
+
+
+def load_html(html_path):
+\t\"\"\"Return (HTML, offset for the boot script), cached per process until the file changes.
+
+\tAsset paths are rewritten by bench nextjs-export, so the file is used as is.
+\t\"\"\"
+\tmtime = os.stat(html_path).st_mtime_ns
+\tcached = _html_cache.get(html_path)
+\tif cached and cached[0] == mtime:
+\t\treturn cached[1], cached[2]
+
+\twith open(html_path) as f:
+\t\thtml = f.read()
+\tmatch = _HEAD_TAG.search(html)
+\toffset = match.end() if match else html.find("<script")
+\t_html_cache[html_path] = (mtime, html, offset)
+\treturn html, offset
 
 
 def get_context(context):
@@ -1754,20 +1861,39 @@ def get_context(context):
 \trequest_path = (frappe.local.request.path or "").strip("/")
 \tsub_path = request_path[len("{{ spa_name }}"):].strip("/") if request_path.startswith("{{ spa_name }}") else ""
 
-\thtml_path = os.path.join(www_spa, sub_path, "index.html") if sub_path else os.path.join(www_spa, "index.html")
-\tif not os.path.isfile(html_path):
-\t\thtml_path = os.path.join(www_spa, "index.html")
+\ttry:
+\t\thtml, offset = load_html(os.path.join(www_spa, sub_path, "index.html"))
+\texcept OSError:
+\t\thtml, offset = load_html(os.path.join(www_spa, "index.html"))
 
-\twith open(html_path) as f:
-\t\thtml = f.read()
-\t# Rewrite old asset paths for builds before assetPrefix was fixed
-\thtml = html.replace('"/{{ spa_name }}/_next/', f'"{ASSET_PREFIX}/_next/')
-\thtml = html.replace("'/{{ spa_name }}/_next/", f"'{ASSET_PREFIX}/_next/")
+\t# Boot data is per session, so it is spliced in after the cache (and no_cache stays on)
+\tif offset >= 0:
+\t\thtml = html[:offset] + get_boot_script() + html[offset:]
 \tcontext.page_content = html
 """
-
 SPA_PAGE_HTML = """{{ page_content | safe }}"""
 
+# nginx snippet for SPAPage X-Accel-Redirect offload (site config: nextjs_sendfile = "x-accel-redirect")
+# and immutable caching of content-hashed Next.js chunks under /assets/<app>/<spa>/_next/static
+NGINX_ACCEL_CONF = """# Add inside the server block for your bench in nginx.conf
+location ~ ^/assets/[^/]+/[^/]+/_next/static/ {
+	root {{ sites_path }};
+	try_files $uri =404;
+	gzip_static on;
+	# brotli_static on;  # requires ngx_brotli
+	add_header Cache-Control "public, max-age=31536000, immutable";
+	add_header Vary Accept-Encoding;
+}
+
+location {{ accel_prefix }}/ {
+	internal;
+	alias {{ apps_path }}/;
+	gzip_static on;
+	# brotli_static on;  # requires ngx_brotli
+	add_header Vary Accept-Encoding;
+}
+"""
+
 # Login page (TypeScript)
 NEXTJS_LOGIN_PAGE_TSX = """'use client';
 
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import shutil
+import time
+
+from pathlib import Path
+from .releases import link_or_copy
+
+# Everything that can change `next build` output, relative to the frontend directory
+SOURCE_DIRS = ("src", "public")
+SOURCE_FILES = (
+    "package.json",
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "next.config.js",
+    "next.config.mjs",
+    "next.config.ts",
+    "tsconfig.json",
+    "jsconfig.json",
+    "tailwind.config.js",
+    "tailwind.config.ts",
+    "postcss.config.js",
+    "postcss.config.mjs",
+    "components.json",
+    ".env",
+    ".env.production",
+    ".env.local",
+    ".env.production.local",
+)
+# Environment variables inlined into the bundle by Next.js
+ENV_PREFIXES = ("NEXT_PUBLIC_",)
+ENV_VARS = ("NODE_ENV",)
+
+# Build output restored on a cache hit: the export and the metadata nextjs-export and nextjs-bundle-size read
+BUILD_ARTIFACTS = (
+    "out",
+    ".next/BUILD_ID",
+    ".next/routes-manifest.json",
+    ".next/build-manifest.json",
+    ".next/app-build-manifest.json",
+)
+
+# Builds kept per frontend (e.g. to switch branches back and forth without rebuilding)
+DEFAULT_CACHE_ENTRIES = 3
+
+
+def compute_build_key(spa_path: Path) -> str:
+    """Hash the sources, config files, lockfile and build environment of a frontend."""
+    digest = hashlib.sha256()
+    paths = [spa_path / name for name in SOURCE_FILES]
+    for source_dir in SOURCE_DIRS:
+        if (spa_path / source_dir).is_dir():
+            paths += (spa_path / source_dir).rglob("*")
+
+    for path in sorted(path for path in paths if path.is_file()):
+        digest.update(path.relative_to(spa_path).as_posix().encode() + b"\0")
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+
+    for name, value in sorted(os.environ.items()):
+        if name in ENV_VARS or name.startswith(ENV_PREFIXES):
+            digest.update(f"{name}={value}\0".encode())
+    return digest.hexdigest()
+
+
+def copy_artifacts(source: Path, target: Path):
+    """Hardlink the build artifacts of one directory into another (both laid out like a frontend)."""
+    for name in BUILD_ARTIFACTS:
+        source_path = source / name
+        target_path = target / name
+        if source_path.is_dir():
+            shutil.copytree(source_path, target_path, copy_function=link_or_copy)
+        elif source_path.is_file():
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            link_or_copy(source_path, target_path)
+
+
+class BuildCache:
+    """Exported builds of one frontend keyed by compute_build_key(), e.g. in <bench>/.nextjs-cache/<app>/<frontend>."""
+
+    def __init__(self, path: Path, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+
+    def has(self, key: str) -> bool:
+        return (self.path / key / "out" / "index.html").is_file()
+
+    def store(self, key: str, spa_path: Path):
+        """Keep the frontend's current build under key. Hardlinks, since next build replaces out/ rather than editing it."""
+        if self.has(key) or not (spa_path / "out" / "index.html").is_file():
+            return
+        tmp_path = self.path / f".{key}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        shutil.rmtree(self.path / key, ignore_errors=True)
+        copy_artifacts(spa_path, tmp_path)
+        os.replace(tmp_path, self.path / key)
+        self.prune()
+
+    def restore(self, key: str, spa_path: Path):
+        """Put the cached build back in the frontend directory, replacing its out/."""
+        for name in BUILD_ARTIFACTS:
+            path = spa_path / name
+            if path.is_dir():
+                shutil.rmtree(path)
+            elif path.is_file():
+                path.unlink()
+        copy_artifacts(self.path / key, spa_path)
+        os.utime(self.path / key, (time.time(), time.time()))
+
+    def prune(self):
+        entries = sorted(
+            (path for path in self.path.iterdir() if path.is_dir() and not path.name.startswith(".")),
+            key=lambda path: path.stat().st_mtime,
+        )
+        for path in entries[: -self.max_entries]:
+            shutil.rmtree(path)
@@ -0,0 +1,215 @@
+import click
+import gzip
+import json
+import time
+
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Per-route budgets in KB of gzipped first-load JS/CSS, next to package.json:
+#   {"default": {"js": 200, "css": 50}, "routes": {"/dashboard": {"js": 300}, "/admin/*": {"js": 400}}}
+BUDGETS_FILE = "bundle-budgets.json"
+# One entry per build, oldest first, for charting trends
+HISTORY_FILE = "bundle-history.json"
+MAX_HISTORY = 200
+
+ASSET_TYPES = {".js": "js", ".css": "css"}
+
+
+def measure(data: bytes) -> dict:
+    """Raw, gzip and (when brotli is installed) brotli size of an asset."""
+    sizes = {"raw": len(data), "gzip": len(gzip.compress(data, compresslevel=9, mtime=0))}
+    sizes["brotli"] = len(brotli.compress(data, quality=11)) if brotli else None
+    return sizes
+
+
+def add_sizes(total: dict, sizes: dict):
+    for key, value in sizes.items():
+        if value is None or total.get(key, 0) is None:
+            total[key] = None
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+def get_app_route(page: str) -> str:
+    """URL path of an app-build-manifest page key, e.g. /(shop)/orders/[id]/page -> /orders/[id]."""
+    segments = [s for s in page.split("/")[1:-1] if not (s.startswith("(") and s.endswith(")")) and not s.startswith("@")]
+    return "/" + "/".join(segments)
+
+
+def get_app_layouts(page: str) -> list:
+    """Layout keys that wrap an app-build-manifest page, outermost first."""
+    segments = page.split("/")[1:-1]
+    return ["/".join(["", *segments[:depth], "layout"]) for depth in range(len(segments) + 1)]
+
+
+def format_kb(size) -> str:
+    return "-" if size is None else f"{size / 1024:.1f} kB"
+
+
+def format_delta(size, previous) -> str:
+    if size is None or previous is None:
+        return "new" if previous is None and size is not None else ""
+    delta = size - previous
+    if not delta:
+        return ""
+    return f"{'+' if delta > 0 else '-'}{abs(delta) / 1024:.1f} kB"
+
+
+class NextJSBundleAnalyzer:
+    def __init__(self, app: str, spa_name: str):
+        """Initialize a new NextJSBundleAnalyzer instance."""
+        self.app = app
+        self.spa_name = spa_name
+        self.spa_path: Path = Path("../apps") / app / spa_name
+        self.next_path: Path = self.spa_path / ".next"
+        self.out_path: Path = self.spa_path / "out"
+        self._sizes = {}
+
+        if not (self.next_path / "build-manifest.json").is_file():
+            click.echo(f"No Next.js build found at {self.next_path}. Run npm run build:frappe first.", err=True)
+            exit(1)
+
+    def read_json(self, path: Path) -> dict:
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def get_build_id(self) -> str:
+        build_id_path = self.next_path / "BUILD_ID"
+        return build_id_path.read_text().strip() if build_id_path.is_file() else None
+
+    def get_route_assets(self) -> dict:
+        """First-load JS and CSS files of each route, as paths relative to .next."""
+        build_manifest = self.read_json(self.next_path / "build-manifest.json")
+        pages = build_manifest.get("pages") or {}
+        # Polyfills are nomodule and low-priority files load after hydration; neither is first-load
+        excluded = set(build_manifest.get("polyfillFiles") or []) | set(build_manifest.get("lowPriorityFiles") or [])
+        routes = {}
+
+        app_pages = self.read_json(self.next_path / "app-build-manifest.json").get("pages") or {}
+        root_files = build_manifest.get("rootMainFiles") or []
+        for page, files in app_pages.items():
+            if not page.endswith("/page"):
+                continue
+            assets = list(root_files)
+            for layout in get_app_layouts(page):
+                assets += app_pages.get(layout) or []
+            routes[get_app_route(page)] = assets + files
+
+        for page, files in pages.items():
+            if page.startswith("/_"):
+                continue
+            routes.setdefault(page, (pages.get("/_app") or []) + files)
+
+        return {
+            route: sorted({f for f in files if Path(f).suffix in ASSET_TYPES and f not in excluded})
+            for route, files in sorted(routes.items())
+        }
+
+    def get_file_sizes(self, rel_path: str) -> dict:
+        """Sizes of a chunk, read from .next or from out/_next when the build was restored from cache."""
+        if rel_path not in self._sizes:
+            for path in (self.next_path / rel_path, self.out_path / "_next" / rel_path):
+                if path.is_file():
+                    self._sizes[rel_path] = measure(path.read_bytes())
+                    break
+            else:
+                self._sizes[rel_path] = None
+        return self._sizes[rel_path]
+
+    def analyze(self) -> dict:
+        """First-load sizes per route: {route: {"js": {raw, gzip, brotli}, "css": {...}}}."""
+        routes = {}
+        for route, files in self.get_route_assets().items():
+            totals = {kind: {"raw": 0, "gzip": 0, "brotli": 0} for kind in ASSET_TYPES.values()}
+            for rel_path in files:
+                sizes = self.get_file_sizes(rel_path)
+                if sizes:
+                    add_sizes(totals[ASSET_TYPES[Path(rel_path).suffix]], sizes)
+            routes[route] = totals
+        return routes
+
+    def load_budgets(self, default_js: float = None) -> dict:
+        budgets = self.read_json(self.spa_path / BUDGETS_FILE)
+        if default_js is not None:
+            budgets.setdefault("default", {})["js"] = default_js
+        return budgets
+
+    def get_budget(self, budgets: dict, route: str) -> dict:
+        """Budget for a route: the exact entry or first matching pattern, over the defaults."""
+        budget = dict(budgets.get("default") or {})
+        patterns = budgets.get("routes") or {}
+        match = patterns.get(route) or next(
+            (value for pattern, value in patterns.items() if fnmatchcase(route, pattern)), {}
+        )
+        budget.update(match)
+        return budget
+
+    def check_budgets(self, routes: dict, budgets: dict) -> list:
+        """Routes over budget, as (route, kind, gzip size, budget in bytes)."""
+        exceeded = []
+        for route, sizes in routes.items():
+            for kind, limit in self.get_budget(budgets, route).items():
+                if kind in sizes and limit is not None and sizes[kind]["gzip"] > limit * 1024:
+                    exceeded.append((route, kind, sizes[kind]["gzip"], limit * 1024))
+        return exceeded
+
+    def load_history(self) -> list:
+        history = self.read_json(self.spa_path / HISTORY_FILE)
+        return history if isinstance(history, list) else []
+
+    def get_previous(self, history: list, build_id: str) -> dict:
+        """Routes of the last recorded build other than this one."""
+        for entry in reversed(history):
+            if entry.get("build_id") != build_id:
+                return entry.get("routes") or {}
+        return {}
+
+    def save_history(self, history: list, build_id: str, routes: dict):
+        history = [entry for entry in history if entry.get("build_id") != build_id]
+        history.append({"build_id": build_id, "timestamp": int(time.time()), "routes": routes})
+        history_path = self.spa_path / HISTORY_FILE
+        tmp_path = history_path.with_name(f".{HISTORY_FILE}.tmp")
+        tmp_path.write_text(json.dumps(history[-MAX_HISTORY:], indent=1))
+        tmp_path.replace(history_path)
+
+    def report(self, routes: dict, previous: dict):
+        if not routes:
+            click.echo("No routes found in the build manifests")
+            return
+        width = max(len(route) for route in routes)
+        click.echo(f"{'Route':<{width}}  {'JS':>10} {'gzip':>10} {'brotli':>10} {'CSS gzip':>10}  Change (JS gzip)")
+        for route, sizes in routes.items():
+            js, css = sizes["js"], sizes["css"]
+            before = (previous.get(route) or {}).get("js", {}).get("gzip") if previous else js["gzip"]
+            click.echo(
+                f"{route:<{width}}  {format_kb(js['raw']):>10} {format_kb(js['gzip']):>10}"
+                f" {format_kb(js['brotli']):>10} {format_kb(css['gzip']):>10}  {format_delta(js['gzip'], before)}"
+            )
+        if previous:
+            for route in sorted(set(previous) - set(routes)):
+                click.echo(f"{route:<{width}}  removed")
+
+    def run(self, budget: float = None, save: bool = True) -> list:
+        """Report per-route first-load sizes against the previous build. Returns the budgets exceeded."""
+        build_id = self.get_build_id()
+        routes = self.analyze()
+        history = self.load_history()
+        self.report(routes, self.get_previous(history, build_id))
+        if not brotli:
+            click.echo("brotli is not installed - brotli sizes are not measured (pip install brotli)")
+
+        exceeded = self.check_budgets(routes, self.load_budgets(budget))
+        for route, kind, size, limit in exceeded:
+            click.echo(f"{route}: first-load {kind} is {format_kb(size)} gzipped, over its {format_kb(limit)} budget", err=True)
+
+        if save:
+            self.save_history(history, build_id, routes)
+        return exceeded
@@ -0,0 +1,164 @@
+import click
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from .releases import link_or_copy
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+# next/image's default deviceSizes and imageSizes - the only widths the generated loader is asked for
+IMAGE_WIDTHS = (16, 32, 48, 64, 96, 128, 256, 384, 640, 750, 828, 1080, 1200, 1920, 2048, 3840)
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+IMAGE_QUALITY = {"webp": 80, "avif": 60}
+
+# Variants of an image go next to it: <dir>/_img/<width>/<name>.<format>
+VARIANT_DIR = "_img"
+
+# Variants encoded by earlier exports, keyed by source content hash; shared by all frontends on the bench
+IMAGE_CACHE_PATH = Path("../.nextjs-cache") / ".images"
+IMAGE_CACHE_MAX_AGE = 30 * 24 * 3600
+
+# Encoder processes per export, so an export inside a build-nextjs pool stays within its share of the machine
+IMAGE_JOBS_ENV = "NEXTJS_IMAGE_JOBS"
+MAX_IMAGE_JOBS = 4
+
+
+def get_image_formats() -> tuple:
+    """Variant formats this Pillow build can encode (none without Pillow)."""
+    if Image is None:
+        return ()
+    return tuple(fmt for fmt in IMAGE_QUALITY if features.check(fmt))
+
+
+def get_image_jobs() -> int:
+    """Encoder processes for one export: NEXTJS_IMAGE_JOBS if set (build-nextjs sets it), else a few cores."""
+    try:
+        return max(1, int(os.environ[IMAGE_JOBS_ENV]))
+    except (KeyError, ValueError):
+        return max(1, min(os.cpu_count() or 1, MAX_IMAGE_JOBS))
+
+
+def get_image_key(path: Path, formats: tuple) -> str:
+    """Hash of an image and the settings its variants are encoded with."""
+    digest = hashlib.sha256(json.dumps([IMAGE_WIDTHS, formats, IMAGE_QUALITY]).encode())
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_variants(source: Path, target: Path, formats: tuple):
+    """Write <target>/<width>.<format> for every standard width. Runs in a worker process.
+
+    Images are never upscaled: widths above the image's own are hardlinks to the full-size variant.
+    """
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if alpha else "RGB")
+
+        encoded = {}
+        for width in IMAGE_WIDTHS:
+            size = min(width, image.width)
+            if size not in encoded:
+                resized = image
+                if size < image.width:
+                    resized = image.resize((size, max(1, round(image.height * size / image.width))), Image.LANCZOS)
+                for fmt in formats:
+                    resized.save(tmp_path / f"{width}.{fmt}", fmt.upper(), quality=IMAGE_QUALITY[fmt])
+                encoded[size] = width
+            else:
+                for fmt in formats:
+                    link_or_copy(tmp_path / f"{encoded[size]}.{fmt}", tmp_path / f"{width}.{fmt}")
+
+    try:
+        os.replace(tmp_path, target)
+    except OSError:
+        # Another export encoded the same image first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+class ImageOptimizer:
+    """Resized WebP/AVIF variants of the images in an export directory, encoded in a process pool."""
+
+    def __init__(self, root: Path, cache_path: Path = IMAGE_CACHE_PATH, jobs: int = None):
+        self.root = root
+        self.cache_path = cache_path
+        self.jobs = jobs or get_image_jobs()
+        self.formats = get_image_formats()
+
+    def find_images(self) -> list:
+        return sorted(
+            path
+            for path in self.root.rglob("*")
+            if path.suffix.lower() in IMAGE_EXTENSIONS
+            and VARIANT_DIR not in path.relative_to(self.root).parts
+            and path.is_file()
+        )
+
+    def get_cache_entry(self, key: str) -> Path:
+        return self.cache_path / key[:2] / key
+
+    def optimize(self) -> tuple:
+        """Write variants for every image, encoding only images not in the cache. Returns (images, encoded)."""
+        images = {path: get_image_key(path, self.formats) for path in self.find_images()}
+        missing = {key: path for path, key in images.items() if not self.get_cache_entry(key).is_dir()}
+
+        if missing:
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                futures = {
+                    key: pool.submit(encode_variants, path, self.get_cache_entry(key), self.formats)
+                    for key, path in missing.items()
+                }
+                for key, future in futures.items():
+                    try:
+                        future.result()
+                    except Exception as e:
+                        click.echo(f"Could not optimize {missing[key]}: {e}", err=True)
+
+        for path, key in images.items():
+            entry = self.get_cache_entry(key)
+            if entry.is_dir():
+                self.link_variants(path, entry)
+                os.utime(entry)
+        self.prune_cache()
+        return len(images), len(missing)
+
+    def find_missing(self, fmt: str = "webp") -> list:
+        """Images lacking a variant in fmt at some standard width - the loader would point at a missing file."""
+        return [
+            path
+            for path in self.find_images()
+            if not all(
+                (path.parent / VARIANT_DIR / str(width) / f"{path.name}.{fmt}").is_file() for width in IMAGE_WIDTHS
+            )
+        ]
+
+    def link_variants(self, path: Path, entry: Path):
+        for variant in entry.iterdir():
+            target = path.parent / VARIANT_DIR / variant.stem / f"{path.name}{variant.suffix}"
+            if target.is_file() and os.path.samefile(target, variant):
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.unlink(missing_ok=True)
+            link_or_copy(variant, target)
+
+    def prune_cache(self):
+        """Delete variants no export has used for IMAGE_CACHE_MAX_AGE."""
+        cutoff = time.time() - IMAGE_CACHE_MAX_AGE
+        for entry in self.cache_path.glob("*/*"):
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry, ignore_errors=True)
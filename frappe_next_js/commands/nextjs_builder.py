@@ -0,0 +1,175 @@
+import click
+import json
+import os
+import subprocess
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from frappe_next_js.spa_manifest import BUILD_STAMP_FILE
+from .build_cache import BuildCache, compute_build_key
+from .image_optimizer import IMAGE_JOBS_ENV, MAX_IMAGE_JOBS
+from .utils import get_app_package_name
+
+# Key of the sources the frontend's out/ was built from, kept next to .next/BUILD_ID
+BUILD_KEY_FILE = Path(".next") / "frappe-build-key"
+
+# Peak memory of one `next build`; the pool never runs more builds than available memory allows
+BUILD_MEMORY_BYTES = 2 * 1024**3
+
+
+def get_available_memory():
+    """Available physical memory in bytes, or None if it cannot be determined."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def get_pool_size(frontend_count: int) -> int:
+    """Concurrent builds: bounded by CPU cores, available memory and the number of frontends."""
+    cores = os.cpu_count() or 1
+    memory = get_available_memory()
+    by_memory = max(1, memory // BUILD_MEMORY_BYTES) if memory else cores
+    return max(1, min(cores, by_memory, frontend_count))
+
+
+def find_frontends(apps_path: Path, apps: list) -> list:
+    """(app, frontend) pairs for every frontend created by add-nextjs: a directory with a build:frappe script."""
+    frontends = []
+    for app in apps:
+        app_path = apps_path / app
+        if not app_path.is_dir():
+            continue
+        for package_json in sorted(app_path.glob("*/package.json")):
+            try:
+                scripts = json.loads(package_json.read_text()).get("scripts") or {}
+            except (OSError, ValueError):
+                continue
+            if "build:frappe" in scripts:
+                frontends.append((app, package_json.parent.name))
+    return frontends
+
+
+def get_bench_apps() -> list:
+    """Apps on the bench, in apps.txt order (falls back to the apps directory)."""
+    apps_txt = Path("apps.txt")
+    if apps_txt.is_file():
+        return [app.strip() for app in apps_txt.read_text().splitlines() if app.strip()]
+    return sorted(path.name for path in Path("../apps").iterdir() if path.is_dir())
+
+
+class NextJSBuilder:
+    def __init__(self, apps: list = None, jobs: int = None, install: bool = True, force: bool = False):
+        """Initialize a new NextJSBuilder instance."""
+        self.apps_path = Path("../apps")
+        self.frontends = find_frontends(self.apps_path, apps or get_bench_apps())
+        self.jobs = jobs or get_pool_size(len(self.frontends))
+        self.install = install
+        self.force = force
+        self.cache_path = Path("../.nextjs-cache")
+        self._output_lock = threading.Lock()
+
+    def echo(self, message: str, err: bool = False):
+        with self._output_lock:
+            click.echo(message, err=err)
+
+    def get_build_command(self) -> str:
+        return "npm install && npm run build:frappe" if self.install else "npm run build:frappe"
+
+    def run(self, command: str, cwd: Path, prefix: str) -> int:
+        """Run a shell command, streaming its output with prefix. Returns the exit code."""
+        process = subprocess.Popen(
+            command,
+            shell=True,
+            cwd=cwd,
+            # The export's image encoders share the cores with the other builds in the pool
+            env={**os.environ, IMAGE_JOBS_ENV: str(max(1, min(MAX_IMAGE_JOBS, (os.cpu_count() or 1) // self.jobs)))},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+        )
+        for line in process.stdout:
+            self.echo(f"{prefix} {line.rstrip()}")
+        return process.wait()
+
+    def is_deployed(self, app: str, spa_path: Path) -> bool:
+        """Whether the live export in www is the build currently in out/."""
+        build_id_path = spa_path / ".next" / "BUILD_ID"
+        stamp_path = self.apps_path / app / get_app_package_name(app) / "www" / spa_path.name / BUILD_STAMP_FILE
+        try:
+            return build_id_path.read_text().strip() == stamp_path.read_text().strip()
+        except OSError:
+            return False
+
+    def build_frontend(self, frontend: tuple) -> dict:
+        """Build one frontend, or reuse its cached build if the sources are unchanged.
+
+        On a cache hit, install and build are skipped: the cached out/ is restored if it
+        is not the one in place, and exported only if www is not already serving it.
+        """
+        app, spa_name = frontend
+        prefix = f"[{app}/{spa_name}]"
+        spa_path = self.apps_path / app / spa_name
+        start = time.monotonic()
+        key = compute_build_key(spa_path)
+        cache = BuildCache(self.cache_path / app / spa_name)
+        key_path = spa_path / BUILD_KEY_FILE
+
+        cached = not self.force and cache.has(key)
+        if cached:
+            current_key = key_path.read_text().strip() if key_path.is_file() else None
+            if current_key != key or not (spa_path / "out" / "index.html").is_file():
+                self.echo(f"{prefix} Restoring cached build {key[:12]}")
+                cache.restore(key, spa_path)
+                key_path.write_text(key)
+            if self.is_deployed(app, spa_path):
+                self.echo(f"{prefix} Unchanged since the deployed build, skipping")
+                returncode = 0
+            else:
+                returncode = self.run("npm run export-assets", spa_path, prefix)
+        else:
+            returncode = self.run(self.get_build_command(), spa_path, prefix)
+            if returncode == 0 and (spa_path / "out" / "index.html").is_file():
+                key_path.parent.mkdir(exist_ok=True)
+                key_path.write_text(key)
+                cache.store(key, spa_path)
+
+        return {
+            "frontend": f"{app}/{spa_name}",
+            "returncode": returncode,
+            "seconds": time.monotonic() - start,
+            "cached": cached,
+        }
+
+    def build(self) -> list:
+        """Build all frontends with a bounded pool. Returns one result per frontend, in discovery order."""
+        if not self.frontends:
+            click.echo("No Next.js frontends found")
+            return []
+
+        click.echo(f"Building {len(self.frontends)} frontends, {self.jobs} at a time")
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            results = list(pool.map(self.build_frontend, self.frontends))
+        self.report(results, time.monotonic() - start)
+        return results
+
+    def report(self, results: list, seconds: float):
+        width = max(len(result["frontend"]) for result in results)
+        click.echo("")
+        for result in results:
+            status = "ok" if result["returncode"] == 0 else f"failed ({result['returncode']})"
+            source = "cached" if result["cached"] else "built"
+            click.echo(f"{result['frontend']:<{width}}  {result['seconds']:>7.1f}s  {source:<6}  {status}")
+        hits = sum(1 for result in results if result["cached"])
+        click.echo(f"{'total':<{width}}  {seconds:>7.1f}s  {hits} cache hits, {len(results) - hits} misses")
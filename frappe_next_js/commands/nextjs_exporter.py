@@ -0,0 +1,457 @@
+import click
+import gzip
+import json
+import os
+import re
+import shutil
+import time
+
+from html.parser import HTMLParser
+from pathlib import Path
+from frappe_next_js.spa_manifest import (
+    ENCODING_SUFFIXES,
+    IGNORED_FILES,
+    SYNC_MANIFEST_FILE,
+    compile_route,
+    compute_etag,
+    scan_files,
+    write_manifest_file,
+)
+from frappe_next_js.spa_pack import PACK_FILE, write_pack
+from .releases import (
+    DEFAULT_KEEP_RELEASES,
+    activate_release,
+    create_release,
+    get_current_release,
+    get_releases_path,
+    link_or_copy,
+    list_releases,
+    prune_releases,
+)
+from .image_optimizer import ImageOptimizer
+from .utils import add_gitignore_entries, get_app_package_name
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Text assets worth precompressing; anything smaller than the threshold is served as-is
+COMPRESSIBLE_EXTENSIONS = {".html", ".js", ".css", ".json", ".svg"}
+COMPRESS_MIN_SIZE = 1024
+
+# generateStaticParams value that marks a generic shell for a dynamic route, e.g. { id: '_' }
+ROUTE_PLACEHOLDER = "_"
+
+# Exported files that can reference _next assets
+ASSET_REFERENCE_EXTENSIONS = {".html", ".txt", ".json", ".js", ".css"}
+
+# Critical assets advertised per page; keeps the Link header well under proxy header size limits
+MAX_PRELOADS = 16
+
+
+class CriticalAssetParser(HTMLParser):
+    """Collect the stylesheets and scripts an exported page loads before it can render."""
+
+    def __init__(self):
+        super().__init__()
+        self.preloads = []
+
+    def add(self, href, rel, as_=None, crossorigin=False):
+        if not href or href.startswith("data:") or any(p["href"] == href for p in self.preloads):
+            return
+        preload = {"href": href, "rel": rel}
+        if as_:
+            preload["as"] = as_
+        if crossorigin:
+            preload["crossorigin"] = True
+        self.preloads.append(preload)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "link":
+            rels = (attrs.get("rel") or "").lower().split()
+            if "stylesheet" in rels:
+                self.add(attrs.get("href"), "preload", "style")
+            elif "modulepreload" in rels:
+                self.add(attrs.get("href"), "modulepreload")
+            elif "preload" in rels and attrs.get("as"):
+                self.add(attrs.get("href"), "preload", attrs["as"], "crossorigin" in attrs)
+        elif tag == "script" and attrs.get("src") and "nomodule" not in attrs:
+            if attrs.get("type") == "module":
+                self.add(attrs["src"], "modulepreload")
+            else:
+                self.add(attrs["src"], "preload", "script")
+
+
+def read_sync_manifest(export_path: Path) -> dict:
+    try:
+        return json.loads((export_path / SYNC_MANIFEST_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def get_critical_assets(html: str) -> list:
+    """Return the preloads for an exported page, in document order."""
+    parser = CriticalAssetParser()
+    parser.feed(html)
+    return parser.preloads[:MAX_PRELOADS]
+
+
+def write_file_atomic(path: Path, data: bytes):
+    """Write through a temp file and os.replace(): readers never see a partial file, and a file
+    hardlinked from an older release gets a new inode instead of changing under that release."""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def copy_file_atomic(source: Path, target: Path):
+    tmp_path = target.with_name(f".{target.name}.tmp")
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+def compress_file(path: Path) -> int:
+    """Write .gz (and .br when brotli is installed) siblings for a file. Returns the number written.
+
+    Files whose variants are newer than the file itself were compressed by an earlier export and are skipped.
+    Files that are too small or not compressible lose any siblings left from an earlier version, as do
+    dotfiles - the export's own manifests are never served, so neither may their compressed copies be.
+    """
+    existing = [path.with_name(path.name + suffix) for suffix in ENCODING_SUFFIXES]
+    stat = path.stat()
+    if (
+        path.suffix not in COMPRESSIBLE_EXTENSIONS
+        or stat.st_size < COMPRESS_MIN_SIZE
+        or path.name.startswith(".")
+        or path.name in IGNORED_FILES
+    ):
+        for variant_path in existing:
+            variant_path.unlink(missing_ok=True)
+        return 0
+    if any(variant.is_file() for variant in existing) and all(
+        not variant.is_file() or variant.stat().st_mtime >= stat.st_mtime for variant in existing
+    ):
+        return 0
+
+    data = path.read_bytes()
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli:
+        variants[".br"] = brotli.compress(data, quality=11)
+
+    written = 0
+    for suffix in ENCODING_SUFFIXES:
+        variant_path = path.with_name(path.name + suffix)
+        compressed = variants.get(suffix)
+        if compressed is not None and len(compressed) < len(data):
+            write_file_atomic(variant_path, compressed)
+            written += 1
+        else:
+            variant_path.unlink(missing_ok=True)
+    return written
+
+
+class NextJSExporter:
+    def __init__(self, app: str, spa_name: str):
+        """Initialize a new NextJSExporter instance."""
+        self.app = app
+        self.spa_name = spa_name
+        self.app_path = Path("../apps") / app
+        self.spa_path: Path = self.app_path / spa_name
+        app_package = get_app_package_name(app)
+        www_base = self.app_path / app_package / "www"
+        # www/<spa>: the live export (a symlink to a release once exported from out/)
+        self.live_path: Path = www_base / spa_name
+        self.releases_path: Path = get_releases_path(www_base, spa_name)
+        # Directory being post-processed: the new release, or the live export when there is no out/
+        self.www_path: Path = self.live_path
+        self.public_path: Path = self.app_path / app_package / "public" / spa_name
+        self.out_path: Path = self.spa_path / "out"
+        self.asset_prefix = f"/assets/{app_package}/{spa_name}/_next/"
+
+        self.validate_export()
+
+    def validate_export(self):
+        """Validate that there is a `next build` export in out/ or an export already copied to www."""
+        if not (self.out_path / "index.html").is_file() and not (self.www_path / "index.html").is_file():
+            click.echo(f"No exported build found at {self.www_path}. Run npm run build:frappe first.", err=True)
+            exit(1)
+
+    def get_build_id(self) -> str:
+        """Return the Next.js BUILD_ID, or a timestamp for builds without one."""
+        build_id_path = self.spa_path / ".next" / "BUILD_ID"
+        if build_id_path.is_file():
+            return build_id_path.read_text().strip()
+        return str(int(time.time()))
+
+    def export(self, keep_releases: int = DEFAULT_KEEP_RELEASES):
+        """Stage out/ as a new release, post-process it so SPAPage can serve it without probing
+        the filesystem, then make it live with a single symlink swap.
+
+        Without an out/ directory, the export already in www is post-processed in place.
+        """
+        build_id = self.get_build_id()
+        release_path = None
+        if (self.out_path / "index.html").is_file():
+            release_path = create_release(self.releases_path, build_id)
+            self.www_path = release_path
+            # Apps created before releases existed only ignore www/<spa>
+            releases_entry = self.releases_path.parent.relative_to(self.app_path).as_posix()
+            if add_gitignore_entries(self.app_path, [releases_entry]):
+                click.echo(f"Added {releases_entry} to .gitignore")
+            self.optimize_images()
+            self.sync()
+
+        self.rewrite_asset_paths()
+        self.validate_asset_references()
+        self.precompress()
+
+        routes = self.get_route_table()
+        preloads = self.get_preloads()
+        self.pack(build_id)
+        files = write_manifest_file(str(self.www_path), build_id, routes, preloads)
+        click.echo(
+            f"Wrote manifest for {len(files)} files and {len(routes)} dynamic routes in {self.www_path} (build {build_id})"
+        )
+
+        if release_path:
+            activate_release(self.live_path, release_path)
+            click.echo(f"Activated release {release_path.name}")
+            kept = prune_releases(self.releases_path, keep_releases, release_path)
+            self.remove_stale_assets(kept)
+            self.remove_inactive_packs(kept, release_path)
+
+    def rollback(self, release_name: str = None):
+        """Make an earlier release live again - by default the one before the current release."""
+        releases = {path.name: path for path in list_releases(self.releases_path)}
+        names = list(releases)
+        current = get_current_release(self.live_path)
+        if release_name is None and current is not None and current.name in names[1:]:
+            release_name = names[names.index(current.name) - 1]
+        if release_name not in releases:
+            click.echo(f"No release to roll back to. Available releases: {', '.join(names) or 'none'}", err=True)
+            exit(1)
+        activate_release(self.live_path, releases[release_name])
+        click.echo(f"Activated release {release_name}")
+
+    def get_previous_export(self):
+        """The live export to reuse unchanged files from: the current release, or an unversioned export."""
+        current = get_current_release(self.live_path)
+        if current is None and self.live_path.is_dir():
+            return self.live_path
+        return current
+
+    def optimize_images(self):
+        """Write resized WebP/AVIF variants of the images in out/ for the generated next/image loader.
+
+        Variants are added to out/ rather than the release, so sync hardlinks them like any other file.
+        The export fails if any image is left without its WebP variants, as next/image would 404 on them.
+        """
+        optimizer = ImageOptimizer(self.out_path)
+        if not optimizer.find_images():
+            return
+        if "webp" not in optimizer.formats:
+            click.echo("Exporting images needs Pillow with WebP support (pip install Pillow)", err=True)
+            exit(1)
+        if "avif" not in optimizer.formats:
+            click.echo("This Pillow cannot encode AVIF - writing WebP variants only (avifLoader URLs will not resolve)")
+
+        images, encoded = optimizer.optimize()
+        missing = optimizer.find_missing()
+        if missing:
+            click.echo(f"{len(missing)} images have no WebP variants:", err=True)
+            for path in missing:
+                click.echo(f"  {path.relative_to(self.out_path).as_posix()}", err=True)
+            exit(1)
+        click.echo(f"Optimized {images} images as {'/'.join(optimizer.formats)} ({images - encoded} from cache)")
+
+    def sync(self):
+        """Populate the new release from out/ and copy changed _next assets into public.
+
+        Files whose source hash matches the previous export (recorded in SYNC_MANIFEST_FILE, since
+        deployed copies are rewritten and precompressed) are hardlinked from it with their
+        precompressed siblings; only changed files are copied. _next assets are content-hashed
+        and shared by all releases in public, so they are copied there only when new.
+        """
+        previous_path = self.get_previous_export()
+        previous = read_sync_manifest(previous_path) if previous_path else {}
+
+        hashes = {}
+        copied = linked = 0
+        for path in sorted(self.out_path.rglob("*")):
+            if not path.is_file():
+                continue
+            rel_path = path.relative_to(self.out_path).as_posix()
+            hashes[rel_path] = compute_etag(str(path))
+            unchanged = previous.get(rel_path) == hashes[rel_path]
+
+            if rel_path.startswith("_next/"):
+                target = self.public_path / rel_path
+                if unchanged and target.is_file():
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                copy_file_atomic(path, target)
+                copied += 1
+                continue
+
+            target = self.www_path / rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            previous_file = previous_path / rel_path if previous_path else None
+            if unchanged and previous_file.is_file():
+                link_or_copy(previous_file, target)
+                for suffix in ENCODING_SUFFIXES:
+                    variant = previous_file.with_name(previous_file.name + suffix)
+                    if variant.is_file():
+                        link_or_copy(variant, target.with_name(target.name + suffix))
+                linked += 1
+            else:
+                shutil.copyfile(path, target)
+                copied += 1
+
+        self.www_path.mkdir(parents=True, exist_ok=True)
+        (self.www_path / SYNC_MANIFEST_FILE).write_text(json.dumps(hashes, indent=1, sort_keys=True))
+        click.echo(f"Copied {copied} and hardlinked {linked} of {len(hashes)} files from {self.out_path}")
+
+    def remove_stale_assets(self, releases: list):
+        """Delete _next assets in public that none of the kept releases reference, so rollbacks still work.
+
+        Skipped if a kept release predates sync manifests, as its assets are unknown.
+        """
+        manifests = [read_sync_manifest(path) for path in releases]
+        if not all(manifests):
+            return
+        current = {
+            self.public_path / rel_path
+            for hashes in manifests
+            for rel_path in hashes
+            if rel_path.startswith("_next/")
+        }
+
+        stale = []
+        if (self.public_path / "_next").is_dir():
+            for path in (self.public_path / "_next").rglob("*"):
+                if not path.is_file() or path in current or path.name.startswith("."):
+                    continue
+                if path.suffix in ENCODING_SUFFIXES and path.with_suffix("") in current:
+                    continue
+                stale.append(path)
+
+        for path in stale:
+            path.unlink(missing_ok=True)
+        for path in {path.parent for path in stale}:
+            while path != self.public_path and path.is_dir() and not any(path.iterdir()):
+                path.rmdir()
+                path = path.parent
+        if stale:
+            click.echo(f"Removed {len(stale)} assets no kept release uses")
+
+    def iter_reference_files(self):
+        for root in (self.www_path, self.public_path):
+            if root.is_dir():
+                for path in root.rglob("*"):
+                    if path.suffix in ASSET_REFERENCE_EXTENSIONS and path.is_file():
+                        yield path
+
+    def rewrite_asset_paths(self):
+        """Point /<spa>/_next/ references (builds without assetPrefix) at /assets/<app>/<spa>/_next/ once, at export.
+
+        Only URLs starting right after a quote, bracket, whitespace, comma or = are rewritten,
+        so references already under /assets/ are left alone.
+        """
+        rewritten = sum(self.rewrite_file(path) for path in self.iter_reference_files())
+        if rewritten:
+            click.echo(f"Rewrote _next asset paths in {rewritten} files")
+
+    def rewrite_file(self, path: Path) -> bool:
+        """Rewrite the /<spa>/_next/ references in one file. Returns whether it changed."""
+        old_prefix = re.compile(rf"""(?<=["'`(\s,=])/{re.escape(self.spa_name)}/_next/""")
+        content = path.read_text(errors="surrogateescape")
+        new_content, count = old_prefix.subn(self.asset_prefix, content)
+        if count:
+            write_file_atomic(path, new_content.encode(errors="surrogateescape"))
+        return bool(count)
+
+    def validate_asset_references(self):
+        """Fail the export if any file references a _next asset that was not exported."""
+        reference = re.compile(re.escape(self.asset_prefix) + r"""([\w\-./~%@+]+\.\w+)""")
+        missing = set()
+        for path in self.iter_reference_files():
+            for asset in reference.findall(path.read_text(errors="surrogateescape")):
+                if not (self.public_path / "_next" / asset).is_file():
+                    missing.add(asset)
+        if missing:
+            click.echo(f"{len(missing)} referenced assets are missing from {self.public_path / '_next'}:", err=True)
+            for asset in sorted(missing):
+                click.echo(f"  {asset}", err=True)
+            exit(1)
+
+    def get_route_table(self) -> list:
+        """Map each dynamic route in .next/routes-manifest.json to prerendered HTML from the export.
+
+        A page exported with the placeholder param (e.g. /orders/_) is preferred as the shell;
+        otherwise the first prerendered instance of the route is used.
+        """
+        routes_manifest_path = self.spa_path / ".next" / "routes-manifest.json"
+        if not routes_manifest_path.is_file():
+            return []
+        with routes_manifest_path.open("r") as f:
+            dynamic_routes = json.load(f).get("dynamicRoutes", [])
+
+        html_routes = {}
+        for path in self.www_path.rglob("index.html"):
+            rel_path = path.relative_to(self.www_path).as_posix()
+            html_routes["/" + rel_path[: -len("index.html")].rstrip("/")] = rel_path
+
+        routes = []
+        for route in dynamic_routes:
+            page = route["page"]
+            if page.startswith("/_") or page.startswith("/api/"):
+                continue
+            regex = compile_route(page)
+            matches = sorted(url for url in html_routes if regex.match(url))
+            if not matches:
+                continue
+            placeholders = [url for url in matches if ROUTE_PLACEHOLDER in url.split("/")]
+            routes.append({"page": page, "file": html_routes[(placeholders or matches)[0]]})
+        return routes
+
+    def get_preloads(self) -> dict:
+        """Record the critical JS/CSS of each exported page for Link preload headers."""
+        preloads = {}
+        for path in self.www_path.rglob("*.html"):
+            assets = get_critical_assets(path.read_text(errors="replace"))
+            if assets:
+                preloads[path.relative_to(self.www_path).as_posix()] = assets
+        return preloads
+
+    def pack(self, build_id: str):
+        """Write the asset pack workers memory-map, so the export is held once in the page cache."""
+        rel_paths = sorted(scan_files(str(self.www_path)))
+        size = write_pack(str(self.www_path), build_id, rel_paths)
+        click.echo(f"Packed {len(rel_paths)} files ({size} bytes)")
+
+    def remove_inactive_packs(self, releases: list, current: Path):
+        """Delete the packs of releases other than the live one.
+
+        A pack is a full copy of its release, so it is not shared between releases the way their
+        hardlinked files are; keeping one per release would multiply disk use by --keep-releases.
+        A release rolled back to serves its files from disk instead.
+        """
+        for path in releases:
+            if path != current:
+                (path / PACK_FILE).unlink(missing_ok=True)
+
+    def precompress(self):
+        """Emit .br/.gz siblings for text assets in www (served by SPAPage) and public (served by nginx)."""
+        if not brotli:
+            click.echo("brotli is not installed - writing .gz variants only (pip install brotli for .br)")
+
+        written = 0
+        for root in (self.www_path, self.public_path):
+            if not root.is_dir():
+                continue
+            for path in root.rglob("*"):
+                if path.suffix in COMPRESSIBLE_EXTENSIONS and path.is_file():
+                    written += compress_file(path)
+        click.echo(f"Wrote {written} precompressed variants")
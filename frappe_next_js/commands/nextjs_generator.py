@@ -3,12 +3,14 @@ import subprocess
 import json
 
 from pathlib import Path
+from frappe_next_js.spa_manifest import RELEASES_DIR
 from .boilerplates import *  # noqa: F403
 from .utils import (
     create_file,
     add_commands_to_root_package_json,
     add_routing_rule_to_hooks,
     add_api_module,
+    add_gitignore_entries,
     get_app_package_name,
 )
 
@@ -102,29 +104,17 @@ class NextJSGenerator:
             create_file(app_package_json, content)
 
     def update_app_gitignore(self):
-        """Add node_modules and frontend output to the app's .gitignore."""
-        gitignore_path = self.app_path / ".gitignore"
-        if not gitignore_path.exists():
-            return
-
-        content = gitignore_path.read_text()
-        entries_to_add = []
-
+        """Add node_modules and frontend output (including export releases) to the app's .gitignore."""
         app_package = get_app_package_name(self.app)
-        www_path = f"{app_package}/www/{self.spa_name}"
-        public_path = f"{app_package}/public/{self.spa_name}"
-        if "node_modules" not in content:
-            entries_to_add.append("node_modules")
-        if www_path not in content:
-            entries_to_add.append(www_path)
-        if public_path not in content:
-            entries_to_add.append(public_path)
-
-        if entries_to_add:
-            if not content.endswith("\n"):
-                content += "\n"
-            content += "\n".join(entries_to_add) + "\n"
-            gitignore_path.write_text(content)
+        add_gitignore_entries(
+            self.app_path,
+            [
+                "node_modules",
+                f"{app_package}/www/{self.spa_name}",
+                f"{app_package}/www/{RELEASES_DIR}",
+                f"{app_package}/public/{self.spa_name}",
+            ],
+        )
 
     def create_package_json(self):
         """Create package.json for the Next.js project."""
@@ -189,6 +179,9 @@ class NextJSGenerator:
         
         # Create shadcn utils (cn function)
         create_file(src_lib_path / "utils.ts", SHADCN_UTILS)
+
+        # Create next/image loader for the exported image variants
+        create_file(src_lib_path / "image-loader.js", self._render_template(NEXTJS_IMAGE_LOADER))
         
         # Create shadcn UI components
         self.create_shadcn_components(src_components_ui_path, src_hooks_path)
@@ -0,0 +1,304 @@
+import click
+import json
+import os
+import subprocess
+import threading
+import time
+
+from pathlib import Path
+from frappe_next_js.spa_manifest import ENCODING_SUFFIXES, SYNC_MANIFEST_FILE, compute_etag, write_manifest_file
+from frappe_next_js.spa_pack import PACK_FILE
+from .build_cache import SOURCE_DIRS, SOURCE_FILES
+from .nextjs_exporter import (
+    ASSET_REFERENCE_EXTENSIONS,
+    NextJSExporter,
+    compress_file,
+    copy_file_atomic,
+    read_sync_manifest,
+    write_file_atomic,
+)
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+# Without watchdog (inotify), sources and out/ are polled this often
+POLL_INTERVAL = 0.5
+# Quiet period after a change before acting on it, so a burst of writes (editor save, next build) is handled once
+DEBOUNCE_SECONDS = 0.3
+# watchdog events that change a file; opened/closed events also fire when sync reads out/
+CHANGE_EVENTS = {"created", "modified", "deleted", "moved"}
+
+
+def snapshot(root: Path) -> dict:
+    """(size, mtime) of every file under root, by relative path."""
+    files = {}
+    if root.is_dir():
+        for path in root.rglob("*"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if path.is_file():
+                files[path.relative_to(root).as_posix()] = (st.st_size, st.st_mtime_ns)
+    return files
+
+
+def update_snapshot(root: Path, files: dict, rel_paths) -> dict:
+    """Copy of a snapshot() of root with only rel_paths stat'ed again."""
+    files = dict(files)
+    for rel_path in rel_paths:
+        path = root / rel_path
+        try:
+            st = path.stat()
+        except OSError:
+            files.pop(rel_path, None)
+            continue
+        if path.is_file():
+            files[rel_path] = (st.st_size, st.st_mtime_ns)
+        else:
+            files.pop(rel_path, None)
+    return files
+
+
+class NextJSWatcher:
+    def __init__(self, app: str, spa_name: str, build: bool = True):
+        """Initialize a new NextJSWatcher instance."""
+        self.exporter = NextJSExporter(app=app, spa_name=spa_name)
+        self.spa_path = self.exporter.spa_path
+        self.out_path = self.exporter.out_path
+        self.public_path = self.exporter.public_path
+        self.build = build
+        self.changed = threading.Event()
+        self.observer = None
+        self.handler = None
+        self.out_watch = None
+        self.out_inode = None
+        # Paths reported by watchdog since the last pass, relative to the frontend directory
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.rescan = True
+
+    def get_sources(self) -> dict:
+        sources = {name: path.stat().st_mtime_ns for name in SOURCE_FILES if (path := self.spa_path / name).is_file()}
+        for source_dir in SOURCE_DIRS:
+            sources.update({f"{source_dir}/{rel}": stat for rel, stat in snapshot(self.spa_path / source_dir).items()})
+        return sources
+
+    def start_observer(self):
+        """Collect changed paths from inotify events, so nothing is scanned until something changes."""
+        if Observer is None:
+            click.echo("watchdog is not installed - polling for changes (pip install watchdog for inotify)")
+            return
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                watcher.on_event(event)
+
+        self.handler = Handler()
+        self.observer = Observer()
+        self.observer.schedule(self.handler, str(self.spa_path), recursive=False)
+        for source_dir in SOURCE_DIRS:
+            if (self.spa_path / source_dir).is_dir():
+                self.observer.schedule(self.handler, str(self.spa_path / source_dir), recursive=True)
+        self.observer.start()
+
+    def watch_out(self):
+        """(Re)watch out/, which next build deletes and recreates."""
+        if self.observer is None or not self.out_path.is_dir():
+            return
+        inode = self.out_path.stat().st_ino
+        if inode != self.out_inode:
+            if self.out_watch is not None:
+                try:
+                    self.observer.unschedule(self.out_watch)
+                except KeyError:
+                    pass
+            self.out_watch = self.observer.schedule(self.handler, str(self.out_path), recursive=True)
+            self.out_inode = inode
+
+    def on_event(self, event):
+        """Record the paths of a watchdog event. Runs in the observer thread."""
+        if event.event_type not in CHANGE_EVENTS or (event.is_directory and event.event_type == "modified"):
+            return
+        with self.lock:
+            for path in (event.src_path, getattr(event, "dest_path", None)):
+                if not path:
+                    continue
+                rel_path = Path(os.path.relpath(path, self.spa_path)).as_posix()
+                if rel_path == "out" or (event.is_directory and rel_path.startswith("out/")):
+                    # out/ recreated or a whole directory moved: its files may not have events of their own
+                    self.rescan = True
+                else:
+                    self.pending.add(rel_path)
+        self.changed.set()
+
+    def take_changes(self) -> tuple:
+        """(whether sources changed, out/ paths changed - None when out/ must be rescanned) since the last call."""
+        with self.lock:
+            pending, self.pending = self.pending, set()
+            rescan, self.rescan = self.rescan, False
+
+        sources_changed = False
+        out_paths = set()
+        for rel_path in pending:
+            parts = rel_path.split("/")
+            if parts[0] == "out":
+                out_paths.add("/".join(parts[1:]))
+            elif parts[0] in SOURCE_DIRS or rel_path in SOURCE_FILES:
+                sources_changed = True
+        return sources_changed, None if rescan else out_paths
+
+    def run_build(self) -> bool:
+        click.echo("Sources changed, running next build...")
+        start = time.monotonic()
+        returncode = subprocess.run("npm run build", shell=True, cwd=self.spa_path).returncode
+        if returncode:
+            click.echo(f"next build failed ({returncode}), keeping the current export", err=True)
+            return False
+        click.echo(f"Built in {time.monotonic() - start:.1f}s")
+        try:
+            self.exporter.optimize_images()
+        except SystemExit:
+            click.echo("Image variants are incomplete, keeping the current export", err=True)
+            return False
+        return True
+
+    def watch(self):
+        """Sync out/ into the live export whenever it changes, rebuilding first when sources change."""
+        if not (self.exporter.live_path / "index.html").is_file():
+            self.exporter.export()
+        self.exporter.www_path = Path(os.path.realpath(self.exporter.live_path))
+
+        self.start_observer()
+        click.echo(f"Watching {self.spa_path} (Ctrl+C to stop)")
+        try:
+            if self.observer:
+                self.watch_events()
+            else:
+                self.watch_polling()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.observer:
+                self.observer.stop()
+                self.observer.join()
+
+    def watch_events(self):
+        """Sync the out/ paths inotify reports; out/ is only scanned whole after a build or when it is recreated."""
+        # Empty at start, and rescan is set, so the first pass catches up on anything built since the last export
+        synced = {}
+        self.changed.set()
+        while True:
+            self.changed.wait()
+            while self.changed.is_set():
+                self.changed.clear()
+                time.sleep(DEBOUNCE_SECONDS)
+            # Before reading out/, so nothing written from here on goes unreported
+            self.watch_out()
+
+            sources_changed, out_paths = self.take_changes()
+            if self.build and sources_changed:
+                if not self.run_build():
+                    continue
+                self.watch_out()
+                # The build rewrote out/; its events are covered by a rescan
+                with self.lock:
+                    self.pending = {path for path in self.pending if not path.startswith("out/")}
+                    self.rescan = False
+                out_paths = None
+
+            if out_paths is None:
+                current = snapshot(self.out_path)
+            elif out_paths:
+                current = update_snapshot(self.out_path, synced, out_paths)
+            else:
+                continue
+            if current == synced or "index.html" not in current:
+                continue
+            self.sync(synced, current)
+            synced = current
+
+    def watch_polling(self):
+        """Without watchdog: snapshot sources and out/ every POLL_INTERVAL."""
+        sources = self.get_sources()
+        synced = {}
+        while True:
+            self.changed.wait(POLL_INTERVAL)
+
+            if self.build and self.get_sources() != sources:
+                time.sleep(DEBOUNCE_SECONDS)
+                sources = self.get_sources()
+                if not self.run_build():
+                    continue
+
+            current = snapshot(self.out_path)
+            if current == synced or "index.html" not in current:
+                continue
+            time.sleep(DEBOUNCE_SECONDS)
+            if snapshot(self.out_path) != current:
+                # Still being written; sync once it settles
+                continue
+            self.sync(synced, current)
+            synced = current
+
+    def sync(self, previous: dict, current: dict):
+        """Copy files of out/ whose content changed into the live export and public, then stamp a new build.
+
+        Every write is a temp file + rename, so workers never read a partial file and files hardlinked
+        from older releases are left untouched.
+        """
+        start = time.monotonic()
+        www_path = self.exporter.www_path
+        hashes = read_sync_manifest(www_path)
+        changed = []
+        for rel_path, stat in current.items():
+            if previous.get(rel_path) == stat:
+                continue
+            source = self.out_path / rel_path
+            try:
+                digest = compute_etag(str(source))
+            except OSError:
+                continue
+            if hashes.get(rel_path) == digest:
+                continue
+            target = (self.public_path if rel_path.startswith("_next/") else www_path) / rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            copy_file_atomic(source, target)
+            hashes[rel_path] = digest
+            changed.append(target)
+
+        # _next chunks are content-hashed and shared with older releases, so only www files are removed
+        removed = [rel_path for rel_path in hashes if rel_path not in current and not rel_path.startswith("_next/")]
+        for rel_path in removed:
+            del hashes[rel_path]
+            target = www_path / rel_path
+            for path in (target, *(target.with_name(target.name + suffix) for suffix in ENCODING_SUFFIXES)):
+                path.unlink(missing_ok=True)
+
+        if not changed and not removed:
+            return
+
+        for path in changed:
+            if path.suffix in ASSET_REFERENCE_EXTENSIONS:
+                self.exporter.rewrite_file(path)
+            # Siblings hold the old content; drop them before deciding whether the new one is worth compressing
+            for suffix in ENCODING_SUFFIXES:
+                path.with_name(path.name + suffix).unlink(missing_ok=True)
+            compress_file(path)
+
+        write_file_atomic(www_path / SYNC_MANIFEST_FILE, json.dumps(hashes, indent=1, sort_keys=True).encode())
+        # The pack holds the old contents; with a new build ID workers read files from disk instead
+        (www_path / PACK_FILE).unlink(missing_ok=True)
+        build_id = f"{self.exporter.get_build_id()}-watch-{time.time_ns() // 1_000_000}"
+        write_manifest_file(
+            str(www_path), build_id, self.exporter.get_route_table(), self.exporter.get_preloads()
+        )
+        click.echo(
+            f"Synced {len(changed)} changed and {len(removed)} removed files in {time.monotonic() - start:.2f}s"
+            f" (build {build_id})"
+        )
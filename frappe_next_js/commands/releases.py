@@ -0,0 +1,83 @@
+import os
+import shutil
+import time
+
+from pathlib import Path
+from frappe_next_js.spa_manifest import RELEASE_FILE, RELEASES_DIR
+
+DEFAULT_KEEP_RELEASES = 5
+
+
+def get_releases_path(www_base: Path, spa_name: str) -> Path:
+    return www_base / RELEASES_DIR / spa_name
+
+
+def get_current_release(live_path: Path):
+    """Release directory www/<spa> points to, or None for an unversioned export."""
+    if not live_path.is_symlink():
+        return None
+    return Path(os.path.realpath(live_path))
+
+
+def stamp_release(release_path: Path, created_ns: int = None):
+    (release_path / RELEASE_FILE).write_text(str(created_ns or time.time_ns()))
+
+
+def get_release_time(release_path: Path) -> int:
+    """When a release was created, in ns. Releases from before RELEASE_FILE fall back to their mtime."""
+    try:
+        return int((release_path / RELEASE_FILE).read_text())
+    except (OSError, ValueError):
+        return release_path.stat().st_mtime_ns
+
+
+def list_releases(releases_path: Path) -> list:
+    """Releases of a frontend, oldest first."""
+    if not releases_path.is_dir():
+        return []
+    releases = [path for path in releases_path.iterdir() if path.is_dir() and not path.name.startswith(".")]
+    return sorted(releases, key=get_release_time)
+
+
+def create_release(releases_path: Path, build_id: str) -> Path:
+    """Make an empty release directory for build_id, stamped with its creation time."""
+    path = releases_path / build_id
+    if path.exists():
+        path = releases_path / f"{build_id}-{int(time.time())}"
+    path.mkdir(parents=True)
+    stamp_release(path)
+    return path
+
+
+def activate_release(live_path: Path, release_path: Path):
+    """Point www/<spa> at release_path by renaming a new symlink over it, so requests see either release whole.
+
+    An unversioned export directory is moved into the releases first, so it can still be rolled back to.
+    """
+    if live_path.is_dir() and not live_path.is_symlink():
+        unversioned = release_path.parent / f"unversioned-{int(time.time())}"
+        live_path.rename(unversioned)
+        stamp_release(unversioned, unversioned.stat().st_mtime_ns)
+    tmp_link = live_path.with_name(f".{live_path.name}.tmp")
+    tmp_link.unlink(missing_ok=True)
+    tmp_link.symlink_to(os.path.relpath(release_path, live_path.parent))
+    os.replace(tmp_link, live_path)
+
+
+def prune_releases(releases_path: Path, keep: int, current: Path) -> list:
+    """Delete all but the newest `keep` releases, never the current one. Returns the releases kept."""
+    releases = list_releases(releases_path)
+    kept = {path.name for path in releases[-keep:]} if keep > 0 else set()
+    kept.add(current.name)
+    for path in releases:
+        if path.name not in kept:
+            shutil.rmtree(path)
+    return [path for path in releases if path.name in kept]
+
+
+def link_or_copy(source: Path, target: Path):
+    """Hardlink an unchanged file from the previous release, so releases share disk and page cache."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
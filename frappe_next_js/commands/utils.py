@@ -10,6 +10,23 @@ def create_file(path: Path, content: str):
         f.write(content)
 
 
+def add_gitignore_entries(app_path: Path, entries: list) -> list:
+    """Append entries missing from the app's .gitignore (if it has one). Returns the entries added."""
+    gitignore_path = app_path / ".gitignore"
+    if not gitignore_path.exists():
+        return []
+
+    content = gitignore_path.read_text()
+    existing = {line.strip().strip("/") for line in content.splitlines()}
+    entries_to_add = [entry for entry in entries if entry.strip("/") not in existing]
+    if entries_to_add:
+        if content and not content.endswith("\n"):
+            content += "\n"
+        content += "\n".join(entries_to_add) + "\n"
+        gitignore_path.write_text(content)
+    return entries_to_add
+
+
 def add_commands_to_root_package_json(app: str, spa_name: str):
     """Add dev commands to the root package.json of the bench."""
     root_package_json_path = Path("../package.json")
@@ -38,7 +55,7 @@ def add_commands_to_root_package_json(app: str, spa_name: str):
 
 
 def add_routing_rule_to_hooks(app: str, spa_name: str):
-    """Add website routing rule to the app's hooks.py."""
+    """Add website routing rule and SPA declaration to the app's hooks.py."""
     hooks_path = Path("../apps") / app / app.replace("-", "_") / "hooks.py"
     
     if not hooks_path.exists():
@@ -51,13 +68,9 @@ def add_routing_rule_to_hooks(app: str, spa_name: str):
     
     # Check if website_route_rules exists
     if "website_route_rules" in hooks_content:
-        # Check if the rule already exists
-        if spa_name in hooks_content:
-            return
-        
-        # Find the website_route_rules list and add to it
+        # Find the website_route_rules list and add to it, unless the rule already exists
         pattern = r'(website_route_rules\s*=\s*\[)'
-        if re.search(pattern, hooks_content):
+        if f'"/{spa_name}/<path:app_path>"' not in hooks_content and re.search(pattern, hooks_content):
             hooks_content = re.sub(
                 pattern,
                 f'\\1\n\t{new_rule},',
@@ -66,6 +79,15 @@ def add_routing_rule_to_hooks(app: str, spa_name: str):
     else:
         # Add website_route_rules at the end of the file
         hooks_content += f'\n\nwebsite_route_rules = [\n\t{new_rule},\n]\n'
+
+    # Declare the SPA mount point so SPAPage can match it without filesystem access
+    new_spa = f'"{spa_name}": {{}}'
+    if "nextjs_spas" in hooks_content:
+        pattern = r'(nextjs_spas\s*=\s*\{)'
+        if f'"{spa_name}":' not in hooks_content and re.search(pattern, hooks_content):
+            hooks_content = re.sub(pattern, f'\\1\n\t{new_spa},', hooks_content)
+    else:
+        hooks_content += f'\nnextjs_spas = {{\n\t{new_spa},\n}}\n'
     
     # Add override for get_logged_user (allow guest)
     app_package = get_app_package_name(app)
@@ -0,0 +1,160 @@
+"""WSGI fast path - serves exported SPA files before Frappe sets up the site, session and DB connection."""
+
+import importlib
+import importlib.util
+import json
+import os
+
+from werkzeug.wrappers import Request
+
+import frappe
+
+from frappe_next_js.spa_cache import DEFAULT_CACHE_MAX_BYTES, DEFAULT_CACHE_MAX_FILE_BYTES, ContentCache
+from frappe_next_js.spa_config import DEFAULT_SPA_CONFIG, get_cache_control, merge_config
+from frappe_next_js.spa_manifest import ManifestRegistry, find_exported_spas
+from frappe_next_js.spa_response import add_preload_links, build_file_response, send_early_hints
+from frappe_next_js.spa_router import SPARouter
+
+
+def get_site_name(environ):
+	"""Site a request is for, resolved like frappe.app: X-Frappe-Site-Name, else the Host without its port."""
+	host = environ.get("HTTP_X_FRAPPE_SITE_NAME") or environ.get("HTTP_HOST") or environ.get("SERVER_NAME") or ""
+	return host.split(":", 1)[0]
+
+
+def is_site(sites_path, site):
+	"""Whether site is a site of this bench - frappe.app answers 404 for anything else."""
+	if not site or site in (".", "..") or "/" in site or os.sep in site:
+		return False
+	try:
+		with open(os.path.join(sites_path, site, "site_config.json")) as f:
+			return bool(json.load(f).get("db_name"))
+	except (OSError, ValueError, AttributeError):
+		return False
+
+
+def get_site_apps(sites_path, site):
+	"""Apps installed on a site, in install order. Needs the site's database, so it is read once per worker."""
+	frappe.init(site, sites_path=sites_path, force=True)
+	try:
+		frappe.connect()
+		return frappe.get_installed_apps()
+	finally:
+		frappe.destroy()
+
+
+def get_app_www_dir(app):
+	spec = importlib.util.find_spec(app)
+	if not spec or not spec.submodule_search_locations:
+		return None
+	return os.path.join(list(spec.submodule_search_locations)[0], "www")
+
+
+def get_app_spa_hooks(app):
+	"""Read the nextjs_spas hook straight from the app's hooks module (no site needed)."""
+	try:
+		hooks = importlib.import_module(f"{app}.hooks")
+	except ImportError:
+		return {}
+	return getattr(hooks, "nextjs_spas", None) or {}
+
+
+class SiteSPAs:
+	"""SPA mount points of one site, from the apps installed on it."""
+
+	def __init__(self, apps):
+		self.www_dirs = [www for www in map(get_app_www_dir, apps) if www and os.path.isdir(www)]
+		self.spa_configs = self.load_spa_configs(apps)
+		self.router = SPARouter(self.spa_configs)
+
+	def get_www_dirs(self):
+		return self.www_dirs
+
+	def load_spa_configs(self, apps):
+		hooks = {}
+		for app in apps:
+			hooks.update(get_app_spa_hooks(app))
+
+		roots = set(hooks)
+		for www in self.www_dirs:
+			roots.update(find_exported_spas(www))
+		return {root: merge_config(DEFAULT_SPA_CONFIG, hooks.get(root)) for root in roots}
+
+
+class SPAStaticMiddleware:
+	"""Answer exact, cacheable SPA file hits without entering Frappe.
+
+	The site is resolved from the request like frappe.app does, and its mount points - the keys
+	of the nextjs_spas hook plus frontends exported before the hook existed - come from the
+	apps installed on it, as SPAPage sees them. Unknown sites, deep links, ranges, large files
+	and non-GET requests fall through to Frappe, where SPAPage handles them.
+	"""
+
+	def __init__(self, app, sites_path=None):
+		self.app = app
+		self.sites_path = sites_path or os.environ.get("SITES_PATH", ".")
+		self.sites = {}
+		self.manifests = ManifestRegistry()
+		self.cache = self.load_content_cache()
+
+	def get_site(self, environ):
+		"""(site, its SPAs) for a request. SPAs are loaded on a site's first request and are None for unknown sites."""
+		site = get_site_name(environ)
+		spas = self.sites.get(site)
+		if spas is None and is_site(self.sites_path, site):
+			try:
+				apps = get_site_apps(self.sites_path, site)
+			except Exception:
+				# Database unreachable - let Frappe report it, and retry on the next request
+				return None, None
+			spas = self.sites[site] = SiteSPAs(apps)
+		return site, spas
+
+	def load_content_cache(self):
+		"""Size the cache from common_site_config.json - there is no site yet at this point."""
+		try:
+			with open(os.path.join(self.sites_path, "common_site_config.json")) as f:
+				conf = json.load(f)
+		except (OSError, ValueError):
+			conf = {}
+		return ContentCache(
+			conf.get("nextjs_cache_max_bytes", DEFAULT_CACHE_MAX_BYTES),
+			conf.get("nextjs_cache_max_file_bytes", DEFAULT_CACHE_MAX_FILE_BYTES),
+		)
+
+	def get_response(self, environ):
+		"""Return a response for a static SPA hit, or None to fall through to Frappe."""
+		if environ.get("REQUEST_METHOD") not in ("GET", "HEAD") or "HTTP_RANGE" in environ:
+			return None
+
+		site, spas = self.get_site(environ)
+		if spas is None:
+			return None
+		request_path = environ.get("PATH_INFO", "").strip("/")
+		spa_root = spas.router.match(request_path)
+		if spa_root is None:
+			return None
+		config = spas.spa_configs[spa_root]
+
+		manifest = self.manifests.get((site, spa_root), spa_root, spas.get_www_dirs)
+		entry = manifest.lookup(request_path) if manifest else None
+		if entry is None or (entry.pack is None and not self.cache.cacheable(entry.size)):
+			return None
+		# Shells with boot data need the session
+		if config["boot"] and entry.mimetype == "text/html":
+			return None
+
+		request = Request(environ)
+		if config["preload"] and config["early_hints"]:
+			send_early_hints(request, entry)
+		cache_control = get_cache_control(config, request_path[len(spa_root) + 1 :], entry.mimetype)
+		response = build_file_response(request, self.cache, manifest.stamp, entry, cache_control)
+		if config["preload"]:
+			add_preload_links(response, entry)
+		return response
+
+	def __call__(self, environ, start_response):
+		response = self.get_response(environ)
+		if response is None:
+			return self.app(environ, start_response)
+		return response(environ, start_response)
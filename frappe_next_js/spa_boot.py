@@ -0,0 +1,105 @@
+"""Per-request session data for SPA HTML shells, injected as window.__FRAPPE_BOOT__.
+
+The shell bytes stay in the content cache; the boot script is spliced in at an offset
+found once per file, so each request only serializes a small JSON payload.
+"""
+
+import hashlib
+import json
+import re
+
+from werkzeug.wrappers import Response
+
+import frappe
+
+from frappe_next_js.spa_response import get_etag, read_file
+
+BOOT_SCRIPT = "<script>window.__FRAPPE_BOOT__={};</script>"
+
+# Characters that could end the script element or break JS string parsing
+_JSON_ESCAPES = {"<": "\\u003c", ">": "\\u003e", "&": "\\u0026", "\u2028": "\\u2028", "\u2029": "\\u2029"}
+
+_HEAD_TAG = re.compile(rb"<head(?:\s[^>]*)?>", re.IGNORECASE)
+
+_offsets = {}
+
+
+def get_boot_data():
+	"""Session data the generated lib/frappe would otherwise fetch on load.
+
+	Guests get no CSRF token: Frappe does not check it for them, and as their session is not
+	persisted get_csrf_token() would mint a new one per request, changing the shell's ETag every time.
+	"""
+	from frappe.sessions import get_csrf_token
+
+	try:
+		setup_complete = bool(frappe.db.get_single_value("System Settings", "setup_complete"))
+	except Exception:
+		setup_complete = None
+
+	user = frappe.session.user
+	return {
+		"user": user,
+		"csrf_token": None if user == "Guest" else get_csrf_token(),
+		"roles": frappe.get_roles(),
+		"lang": frappe.local.lang,
+		"setup_complete": setup_complete,
+	}
+
+
+def render_boot_script(data):
+	payload = json.dumps(data, separators=(",", ":"), default=str)
+	for char, escaped in _JSON_ESCAPES.items():
+		payload = payload.replace(char, escaped)
+	return BOOT_SCRIPT.format(payload).encode()
+
+
+def find_boot_offset(html):
+	"""Byte offset to splice the boot script at: right after <head>, else before the first <script>. -1 if neither.
+
+	It must come before Next's async chunks in <head>, which read the boot data once when they load.
+	"""
+	match = _HEAD_TAG.search(html)
+	if match:
+		return match.end()
+	return html.find(b"<script")
+
+
+def get_boot_offset(entry, validator, html):
+	"""Return find_boot_offset(html), computed once per file version."""
+	cached = _offsets.get(entry.path)
+	if cached is None or cached[0] != validator:
+		cached = (validator, find_boot_offset(html))
+		_offsets[entry.path] = cached
+	return cached[1]
+
+
+def private_cache_control(cache_control):
+	if not cache_control or "private" in cache_control or "no-store" in cache_control:
+		return cache_control
+	return f"private, {cache_control}"
+
+
+def build_boot_response(request, cache, stamp, entry, cache_control=None):
+	"""Serve an HTML shell with the boot script for the current session.
+
+	The ETag covers the shell and the payload, so an unchanged session still revalidates to a 304.
+	"""
+	html = read_file(cache, entry, stamp)
+	offset = get_boot_offset(entry, (stamp, entry.mtime, entry.size), html)
+	script = render_boot_script(get_boot_data())
+	etag = hashlib.sha1(get_etag(entry).encode() + script).hexdigest()
+
+	if request.if_none_match.contains(etag):
+		response = Response(status=304, mimetype=entry.mimetype)
+	elif offset < 0:
+		response = Response(html, mimetype=entry.mimetype)
+	else:
+		response = Response([html[:offset], script, html[offset:]], mimetype=entry.mimetype)
+		response.content_length = len(html) + len(script)
+	response.set_etag(etag)
+	response.vary.add("Cookie")
+	cache_control = private_cache_control(cache_control)
+	if cache_control:
+		response.headers["Cache-Control"] = cache_control
+	return response
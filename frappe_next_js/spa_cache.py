@@ -0,0 +1,69 @@
+"""Per-worker caches for SPA file serving."""
+
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_CACHE_MAX_FILE_BYTES = 1024 * 1024
+
+
+class ContentCache:
+	"""Thread-safe LRU cache of file contents bounded by total size in bytes.
+
+	Entries are keyed by resolved file path and carry a validator (build stamp, mtime, size);
+	a lookup with a different validator is a miss, so stale content is never served.
+	"""
+
+	def __init__(self, max_bytes=DEFAULT_CACHE_MAX_BYTES, max_file_bytes=DEFAULT_CACHE_MAX_FILE_BYTES):
+		self.max_bytes = max_bytes
+		self.max_file_bytes = max_file_bytes
+		self.current_bytes = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def configure(self, max_bytes, max_file_bytes):
+		"""Apply new limits, evicting as needed."""
+		if max_bytes == self.max_bytes and max_file_bytes == self.max_file_bytes:
+			return
+		with self._lock:
+			self.max_bytes = max_bytes
+			self.max_file_bytes = max_file_bytes
+			self._evict()
+
+	def cacheable(self, size):
+		return size <= self.max_file_bytes and size <= self.max_bytes
+
+	def get(self, key, validator):
+		with self._lock:
+			cached = self._entries.get(key)
+			if cached is None:
+				return None
+			if cached[0] != validator:
+				self._remove(key)
+				return None
+			self._entries.move_to_end(key)
+			return cached[1]
+
+	def put(self, key, validator, data):
+		if not self.cacheable(len(data)):
+			return
+		with self._lock:
+			if key in self._entries:
+				self._remove(key)
+			self._entries[key] = (validator, data)
+			self.current_bytes += len(data)
+			self._evict()
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self.current_bytes = 0
+
+	def _remove(self, key):
+		validator, data = self._entries.pop(key)
+		self.current_bytes -= len(data)
+
+	def _evict(self):
+		while self.current_bytes > self.max_bytes and self._entries:
+			key, (validator, data) = self._entries.popitem(last=False)
+			self.current_bytes -= len(data)
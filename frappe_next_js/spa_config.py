@@ -0,0 +1,82 @@
+"""Per-SPA serving options declared by apps in the nextjs_spas hook.
+
+	nextjs_spas = {
+		"frontend": {
+			"cache_control": {"html": "no-cache", "immutable": "public, max-age=31536000, immutable"},
+			"boot": True,
+			"immutable_patterns": [r"^fonts/hashed/"],
+		},
+	}
+"""
+
+import copy
+import re
+
+import frappe
+
+DEFAULT_SPA_CONFIG = {
+	"cache_control": {
+		# HTML shells must revalidate so a new build is picked up; ETags make that a 304
+		"html": "no-cache",
+		# Content-hashed files (see immutable_patterns) never change under the same URL
+		"immutable": "public, max-age=31536000, immutable",
+		"default": "public, max-age=3600",
+	},
+	# Regexes for paths under the SPA root that are content-hashed; apps' patterns are added to these.
+	# Only Next.js build output is known to be hashed - a name like report-20240101.pdf is not.
+	"immutable_patterns": [r"^_next/static/"],
+	# Inject window.__FRAPPE_BOOT__ (user, CSRF token, roles...) into HTML shells. Such shells need the
+	# session, so the WSGI fast path only serves them with this False
+	"boot": True,
+	# Link: rel=preload/modulepreload headers for the critical assets recorded by nextjs-export
+	"preload": True,
+	# Also send them as a 103 Early Hints response, where the WSGI server supports it
+	"early_hints": False,
+}
+
+# Options whose hook values add to the defaults rather than replace them
+LIST_OPTIONS = {"immutable_patterns"}
+
+_configs = {}
+
+
+def merge_config(defaults, hook_value):
+	"""Overlay a nextjs_spas hook value on defaults.
+
+	frappe.get_hooks turns every leaf into a list (one value per app); the last app wins, except
+	for LIST_OPTIONS, which collect the values of every app.
+	Without a default it returns [] when no app declares the hook, hence default={} at call sites.
+	"""
+	config = copy.deepcopy(defaults)
+	for key, value in (hook_value or {}).items():
+		if key in LIST_OPTIONS:
+			values = value if isinstance(value, list) else [value]
+			config[key] = config.get(key, []) + [v for v in values if v not in config.get(key, [])]
+		elif isinstance(value, dict):
+			config[key] = merge_config(config.get(key) or {}, value)
+		elif isinstance(value, list):
+			if value:
+				config[key] = value[-1]
+		else:
+			config[key] = value
+	return config
+
+
+def get_spa_config(spa_root):
+	"""Return the options for spa_root on the current site (cached per worker - hooks change only on restart)."""
+	key = (frappe.local.site, spa_root)
+	config = _configs.get(key)
+	if config is None:
+		config = merge_config(DEFAULT_SPA_CONFIG, frappe.get_hooks("nextjs_spas", default={}).get(spa_root))
+		_configs[key] = config
+	return config
+
+
+def get_cache_control(config, rel_path, mimetype):
+	"""Pick the Cache-Control value for a served file, by its path under the SPA root."""
+	policy = config["cache_control"]
+	if mimetype == "text/html":
+		return policy.get("html")
+	if any(re.search(pattern, rel_path) for pattern in config["immutable_patterns"]):
+		return policy.get("immutable")
+	return policy.get("default")
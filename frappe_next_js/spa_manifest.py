@@ -0,0 +1,341 @@
+"""In-memory file manifest for exported Next.js SPAs - maps request paths to files without probing the filesystem."""
+
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from frappe_next_js.spa_pack import PACK_FILE, open_pack
+
+MANIFEST_FILE = ".nextjs-manifest.json"
+BUILD_STAMP_FILE = ".nextjs-build"
+# Source hashes of the files nextjs-export last synced from out/
+SYNC_MANIFEST_FILE = ".nextjs-sync.json"
+# www/.releases/<spa>/<build id>: versioned exports; www/<spa> is a symlink to the live one
+RELEASES_DIR = ".releases"
+# Creation time of a release; orders releases, as directory mtimes change whenever a release is written to
+RELEASE_FILE = ".nextjs-release"
+MANIFEST_VERSION = 1
+
+# Seconds between build stamp checks. Lookups inside this window are a single dict access.
+STAMP_CHECK_INTERVAL = 2
+
+# Files that live in the export directory but are never served
+IGNORED_FILES = {MANIFEST_FILE, BUILD_STAMP_FILE, PACK_FILE, SYNC_MANIFEST_FILE, RELEASE_FILE}
+
+# Unknown request paths (deep links, bot probes) remembered per build, and for how long
+MISS_CACHE_SIZE = 1024
+MISS_CACHE_TTL = 300
+
+# Precompressed sibling suffix → Content-Encoding, in server preference order
+ENCODING_SUFFIXES = {".br": "br", ".gz": "gzip"}
+
+# Image variants written by nextjs-export, missing from some platforms' mime.types
+mimetypes.add_type("image/webp", ".webp")
+mimetypes.add_type("image/avif", ".avif")
+
+
+class ManifestEntry:
+	"""A servable file resolved from a request path."""
+
+	__slots__ = ("path", "mimetype", "size", "mtime", "etag", "encodings", "links", "pack", "offset")
+
+	def __init__(self, path, mimetype, size, mtime, etag=None, links=None):
+		self.path = path
+		self.mimetype = mimetype
+		self.size = size
+		self.mtime = mtime
+		# Content hash; recorded at export time or computed on first use
+		self.etag = etag
+		# Precompressed variants: {"br": ManifestEntry, "gzip": ManifestEntry}
+		self.encodings = {}
+		# Link header value preloading the critical assets of an HTML page
+		self.links = links
+		# AssetPack holding the contents at offset, if the export was packed
+		self.pack = None
+		self.offset = None
+
+
+class SPAManifest:
+	"""Request path → file map for one SPA root, tagged with the build stamp it was built from."""
+
+	def __init__(self, spa_root, entries, stamp, stamp_path, routes=None):
+		self.spa_root = spa_root
+		self.entries = entries
+		self.stamp = stamp
+		self.stamp_path = stamp_path
+		self.checked_at = time.monotonic()
+		self.fallback = entries.get(spa_root)
+		# Compiled dynamic routes: [(regex, entry)] in Next.js match order
+		self.routes = routes or []
+		# Negative cache: request path → (expiry, route or fallback entry), LRU-bounded.
+		# It lives and dies with this manifest, so a new build stamp starts it empty.
+		self.misses = OrderedDict()
+		self.misses_lock = threading.Lock()
+
+	def lookup(self, request_path):
+		"""Return the entry for a request path (relative to www), or None."""
+		return self.entries.get(request_path)
+
+	def match_route(self, request_path):
+		"""Return the prerendered HTML for a dynamic route (e.g. /orders/[id]) matching request_path, or None."""
+		sub_path = "/" + request_path[len(self.spa_root) :].strip("/")
+		for regex, entry in self.routes:
+			if regex.match(sub_path):
+				return entry
+		return None
+
+	def resolve(self, request_path):
+		"""Return the entry serving request_path: the file itself, else a dynamic route's HTML, else the fallback.
+
+		Misses are remembered for MISS_CACHE_TTL seconds, so repeated unknown paths skip route matching.
+		"""
+		entry = self.entries.get(request_path)
+		if entry is not None:
+			return entry
+
+		now = time.monotonic()
+		with self.misses_lock:
+			miss = self.misses.get(request_path)
+			if miss is not None and miss[0] > now:
+				self.misses.move_to_end(request_path)
+				return miss[1]
+
+		entry = self.match_route(request_path) or self.fallback
+		with self.misses_lock:
+			self.misses[request_path] = (now + MISS_CACHE_TTL, entry)
+			self.misses.move_to_end(request_path)
+			while len(self.misses) > MISS_CACHE_SIZE:
+				self.misses.popitem(last=False)
+		return entry
+
+	def is_current(self):
+		"""Re-check the build stamp at most every STAMP_CHECK_INTERVAL seconds."""
+		now = time.monotonic()
+		if now - self.checked_at < STAMP_CHECK_INTERVAL:
+			return True
+		self.checked_at = now
+		return read_stamp(self.stamp_path) == self.stamp
+
+
+def compile_route(page):
+	"""Compile a Next.js page pattern (/orders/[id], /docs/[...slug], /[[...slug]]) to a regex over URL paths."""
+	pattern = ""
+	for segment in page.strip("/").split("/"):
+		if not segment:
+			continue
+		if segment.startswith("[[...") and segment.endswith("]]"):
+			pattern += "(?:/.+)?"
+		elif segment.startswith("[...") and segment.endswith("]"):
+			pattern += "/.+"
+		elif segment.startswith("[") and segment.endswith("]"):
+			pattern += "/[^/]+"
+		else:
+			pattern += "/" + re.escape(segment)
+	return re.compile(f"^{pattern}/?$")
+
+
+def find_exported_spas(www_base):
+	"""Top-level SPA roots exported into a www directory: those with an export manifest,
+	or (legacy exports) an index.html plus a public/<name>/_next build next to it."""
+	try:
+		names = os.listdir(www_base)
+	except OSError:
+		return []
+	public_base = os.path.join(os.path.dirname(www_base), "public")
+	return [
+		name
+		for name in names
+		if os.path.isfile(os.path.join(www_base, name, MANIFEST_FILE))
+		or (
+			os.path.isfile(os.path.join(www_base, name, "index.html"))
+			and os.path.isdir(os.path.join(public_base, name, "_next"))
+		)
+	]
+
+
+def get_spa_dir(www_base, spa_root):
+	return os.path.join(www_base, *spa_root.split("/"))
+
+
+def get_stamp_path(spa_dir):
+	"""Path whose stat identifies the deployed build (the stamp file, or the directory for legacy exports)."""
+	stamp_file = os.path.join(spa_dir, BUILD_STAMP_FILE)
+	return stamp_file if os.path.isfile(stamp_file) else spa_dir
+
+
+def read_stamp(path):
+	"""Identify a build by inode and mtime of its stamp path - one stat call."""
+	try:
+		st = os.stat(path)
+	except OSError:
+		return None
+	return f"{st.st_ino}:{st.st_mtime_ns}"
+
+
+def guess_mimetype(path):
+	return mimetypes.guess_type(path)[0] or "text/html"
+
+
+def compute_etag(path):
+	"""Strong ETag for a file: a hash of its contents."""
+	digest = hashlib.sha1(usedforsecurity=False)
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(65536), b""):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+def format_link_header(preloads):
+	"""Build a Link header value from recorded preloads: [{"href", "rel", "as"?, "crossorigin"?}]."""
+	links = []
+	for preload in preloads:
+		link = f"<{preload['href']}>; rel={preload['rel']}"
+		if preload.get("as"):
+			link += f"; as={preload['as']}"
+		if preload.get("crossorigin"):
+			link += "; crossorigin"
+		links.append(link)
+	return ", ".join(links) or None
+
+
+def scan_files(spa_dir, with_etags=False):
+	"""Walk an export directory and return {relative path: file info}."""
+	files = {}
+	for basepath, folders, filenames in os.walk(spa_dir):
+		folders[:] = [d for d in folders if not d.startswith(".")]
+		for fname in filenames:
+			# Dotfiles are the export's own bookkeeping (manifests, pack) and anything derived from them
+			if fname.startswith(".") or fname in IGNORED_FILES or fname.endswith(".py"):
+				continue
+			file_path = os.path.join(basepath, fname)
+			st = os.stat(file_path)
+			rel_path = os.path.relpath(file_path, spa_dir).replace(os.sep, "/")
+			files[rel_path] = {
+				"size": st.st_size,
+				"mtime": st.st_mtime,
+				"mimetype": guess_mimetype(fname),
+			}
+			if with_etags:
+				files[rel_path]["etag"] = compute_etag(file_path)
+	return files
+
+
+def load_manifest_file(spa_dir):
+	"""Return the manifest recorded at export time, or None if missing or out of date."""
+	try:
+		with open(os.path.join(spa_dir, MANIFEST_FILE)) as f:
+			data = json.load(f)
+		with open(os.path.join(spa_dir, BUILD_STAMP_FILE)) as f:
+			build_id = f.read().strip()
+	except (OSError, ValueError):
+		return None
+	if data.get("version") != MANIFEST_VERSION or data.get("build_id") != build_id:
+		return None
+	return data
+
+
+def write_manifest_file(spa_dir, build_id, routes=None, preloads=None):
+	"""Record the exported files and stamp the build. The stamp is written last so workers only see complete builds.
+
+	routes is the dynamic route table: [{"page": "/orders/[id]", "file": "orders/_/index.html"}].
+	preloads maps HTML files to their critical assets: {"index.html": [{"href": ..., "rel": "preload", "as": "style"}]}.
+	"""
+	files = scan_files(spa_dir, with_etags=True)
+	for rel_path, assets in (preloads or {}).items():
+		if rel_path in files and assets:
+			files[rel_path]["preload"] = assets
+	data = {"version": MANIFEST_VERSION, "build_id": build_id, "files": files, "routes": routes or []}
+	with open(os.path.join(spa_dir, MANIFEST_FILE), "w") as f:
+		json.dump(data, f, indent=1, sort_keys=True)
+	with open(os.path.join(spa_dir, BUILD_STAMP_FILE), "w") as f:
+		f.write(build_id)
+	return files
+
+
+def build_manifest(spa_root, www_dirs):
+	"""Build the manifest for spa_root from the www directories of installed apps (first app wins).
+
+	Returns None if no app exports an index.html for spa_root.
+	"""
+	entries = {}
+	routes = []
+	stamp_path = stamp = None
+	for www_base in www_dirs:
+		spa_dir = get_spa_dir(www_base, spa_root)
+		if not os.path.isfile(os.path.join(spa_dir, "index.html")):
+			continue
+		if stamp_path is None:
+			# Stamp first, then resolve the release symlink: a release activated in between
+			# leaves this manifest with an old stamp, so the next check rebuilds it
+			stamp_path = get_stamp_path(spa_dir)
+			stamp = read_stamp(stamp_path)
+		spa_dir = os.path.realpath(spa_dir)
+		data = load_manifest_file(spa_dir) or {"files": scan_files(spa_dir)}
+		files = data["files"]
+		pack = open_pack(spa_dir, data["build_id"]) if "build_id" in data else None
+		app_entries = {
+			rel_path: ManifestEntry(
+				os.path.join(spa_dir, *rel_path.split("/")),
+				info["mimetype"],
+				info["size"],
+				info["mtime"],
+				info.get("etag"),
+				format_link_header(info.get("preload") or []),
+			)
+			for rel_path, info in files.items()
+		}
+		for rel_path, entry in app_entries.items():
+			if pack is not None:
+				entry.offset = pack.locate(rel_path, entry.size)
+				if entry.offset is not None:
+					entry.pack = pack
+
+			base_path, suffix = os.path.splitext(rel_path)
+			if suffix in ENCODING_SUFFIXES and base_path in app_entries:
+				# Precompressed sibling - served in place of the original, never on its own
+				app_entries[base_path].encodings[ENCODING_SUFFIXES[suffix]] = entry
+				continue
+
+			request_path = f"{spa_root}/{rel_path}"
+			entries.setdefault(request_path, entry)
+			# Directory with index.html (e.g. /frontend/login → /frontend/login/index.html)
+			if rel_path == "index.html":
+				entries.setdefault(spa_root, entry)
+			elif rel_path.endswith("/index.html"):
+				entries.setdefault(request_path[: -len("/index.html")], entry)
+
+		routes += [
+			(compile_route(route["page"]), app_entries[route["file"]])
+			for route in data.get("routes") or []
+			if route["file"] in app_entries
+		]
+
+	if stamp_path is None:
+		return None
+	return SPAManifest(spa_root, entries, stamp, stamp_path, routes)
+
+
+class ManifestRegistry:
+	"""Per-worker cache of SPA manifests, rebuilt when the build stamp changes."""
+
+	def __init__(self):
+		self._manifests = {}
+
+	def get(self, key, spa_root, get_www_dirs):
+		manifest = self._manifests.get(key)
+		if manifest is not None and manifest.is_current():
+			return manifest
+		manifest = build_manifest(spa_root, get_www_dirs())
+		if manifest is not None:
+			self._manifests[key] = manifest
+		else:
+			self._manifests.pop(key, None)
+		return manifest
+
+	def clear(self):
+		self._manifests.clear()
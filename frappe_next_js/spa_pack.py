@@ -0,0 +1,80 @@
+"""Single-file asset pack for an exported SPA, memory-mapped by every worker.
+
+Layout: PACK_MAGIC, an 8-byte big-endian index length, the JSON index
+({"build_id": ..., "files": {relative path: [offset, length]}}), then the file contents
+back to back. Workers map the pack read-only, so the file contents live once in the
+OS page cache instead of once per worker.
+"""
+
+import json
+import mmap
+import os
+import struct
+
+PACK_FILE = ".nextjs-pack"
+PACK_MAGIC = b"NXPACK1\n"
+_HEADER = struct.Struct(">Q")
+
+
+class AssetPack:
+	"""A read-only mapping of a pack file."""
+
+	def __init__(self, path):
+		with open(path, "rb") as f:
+			self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		magic_end = len(PACK_MAGIC)
+		if self.map[:magic_end] != PACK_MAGIC:
+			raise ValueError(f"{path} is not an asset pack")
+		(index_size,) = _HEADER.unpack_from(self.map, magic_end)
+		index_start = magic_end + _HEADER.size
+		self.index = json.loads(self.map[index_start : index_start + index_size])
+		self.base = index_start + index_size
+
+	@property
+	def build_id(self):
+		return self.index.get("build_id")
+
+	def locate(self, rel_path, size):
+		"""Return the absolute offset of a packed file, or None if it is not packed at that size."""
+		location = self.index["files"].get(rel_path)
+		if location is None or location[1] != size:
+			return None
+		return self.base + location[0]
+
+	def read(self, offset, length):
+		"""Bytes at an absolute offset - a copy out of the shared mapping, as WSGI servers require bytes."""
+		return self.map[offset : offset + length]
+
+
+def write_pack(spa_dir, build_id, rel_paths):
+	"""Pack files of an export directory into PACK_FILE, replacing any previous pack atomically.
+
+	Workers that still map the old pack keep reading it until they load the new manifest.
+	"""
+	files = {}
+	offset = 0
+	for rel_path in rel_paths:
+		length = os.path.getsize(os.path.join(spa_dir, *rel_path.split("/")))
+		files[rel_path] = [offset, length]
+		offset += length
+	index = json.dumps({"build_id": build_id, "files": files}, separators=(",", ":")).encode()
+
+	pack_path = os.path.join(spa_dir, PACK_FILE)
+	tmp_path = f"{pack_path}.{os.getpid()}.tmp"
+	with open(tmp_path, "wb") as pack:
+		pack.write(PACK_MAGIC + _HEADER.pack(len(index)) + index)
+		for rel_path in files:
+			with open(os.path.join(spa_dir, *rel_path.split("/")), "rb") as f:
+				while chunk := f.read(1024 * 1024):
+					pack.write(chunk)
+	os.replace(tmp_path, pack_path)
+	return offset
+
+
+def open_pack(spa_dir, build_id):
+	"""Map the pack for build_id, or return None if there is none or it belongs to another build."""
+	try:
+		pack = AssetPack(os.path.join(spa_dir, PACK_FILE))
+	except (OSError, ValueError):
+		return None
+	return pack if pack.build_id == build_id else None
@@ -1,12 +1,86 @@
 """Page renderer for Next.js SPA - serves static files without Jinja processing."""
 
-import mimetypes
 import os
 
 from werkzeug.wrappers import Response
 
 import frappe
 
+from frappe_next_js.spa_boot import build_boot_response
+from frappe_next_js.spa_cache import DEFAULT_CACHE_MAX_BYTES, DEFAULT_CACHE_MAX_FILE_BYTES, ContentCache
+from frappe_next_js.spa_config import get_cache_control, get_spa_config
+from frappe_next_js.spa_manifest import RELEASES_DIR, ManifestRegistry, find_exported_spas
+from frappe_next_js.spa_response import add_preload_links, build_file_response, send_early_hints
+from frappe_next_js.spa_router import SPARouter
+
+_manifests = ManifestRegistry()
+_content_cache = ContentCache()
+_routers = {}
+
+DEFAULT_ACCEL_PREFIX = "/nextjs-internal"
+
+
+def get_www_dirs():
+	"""www directories of installed apps, in app order."""
+	return [frappe.get_app_path(app, "www") for app in frappe.get_installed_apps()]
+
+
+def get_router():
+	"""Return the SPA mount points for the current site (built once per worker).
+
+	Mount points are the keys of the nextjs_spas hook, plus frontends exported before the hook existed.
+	"""
+	router = _routers.get(frappe.local.site)
+	if router is None:
+		router = SPARouter(frappe.get_hooks("nextjs_spas", default={}))
+		for www_base in get_www_dirs():
+			for spa_root in find_exported_spas(www_base):
+				router.add(spa_root)
+		_routers[frappe.local.site] = router
+	return router
+
+
+def get_manifest(spa_root):
+	"""Return the file manifest for spa_root on the current site (built once per worker)."""
+	return _manifests.get((frappe.local.site, spa_root), spa_root, get_www_dirs)
+
+
+def get_content_cache():
+	"""Return the worker's content cache with limits from site config.
+
+	Site config keys: nextjs_cache_max_bytes (total budget), nextjs_cache_max_file_bytes (largest cached file).
+	"""
+	_content_cache.configure(
+		frappe.conf.get("nextjs_cache_max_bytes", DEFAULT_CACHE_MAX_BYTES),
+		frappe.conf.get("nextjs_cache_max_file_bytes", DEFAULT_CACHE_MAX_FILE_BYTES),
+	)
+	return _content_cache
+
+
+def offload_response(entry):
+	"""Hand the file to the front web server, if site config enables it. Returns None otherwise.
+
+	Site config keys:
+	- nextjs_sendfile: "x-accel-redirect" (nginx) or "x-sendfile" (Apache/lighttpd)
+	- nextjs_accel_prefix: internal nginx location aliased to the bench apps directory
+	"""
+	mode = frappe.conf.get("nextjs_sendfile")
+	if not mode:
+		return None
+
+	response = Response(mimetype=entry.mimetype)
+	if mode == "x-sendfile":
+		response.headers["X-Sendfile"] = entry.path
+		return response
+
+	apps_path = os.path.abspath(os.path.join(frappe.local.sites_path, "..", "apps"))
+	relative_path = os.path.relpath(entry.path, apps_path)
+	if relative_path.startswith(".."):
+		return None
+	prefix = frappe.conf.get("nextjs_accel_prefix", DEFAULT_ACCEL_PREFIX).rstrip("/")
+	response.headers["X-Accel-Redirect"] = f"{prefix}/{relative_path.replace(os.sep, '/')}"
+	return response
+
 
 class SPAPage:
 	"""Serves Next.js SPA from www/{spa_name}/ - index.html and static assets."""
@@ -14,61 +88,57 @@ class SPAPage:
 	def __init__(self, path, http_status_code=None):
 		self.path = path
 		self.http_status_code = http_status_code
+		self._resolution = None
+
+	def resolve(self):
+		"""Resolve the request to (manifest, entry) once - shared by can_render() and render().
 
-	def _get_spa_root(self):
-		"""Extract the SPA root directory name from the path."""
-		return self.path.split("/")[0] if self.path else ""
+		Dynamic routes resolve to their prerendered HTML and anything else to the root index.html;
+		(None, None) means not an SPA request - decided from the mount point trie without filesystem access.
+		"""
+		if self._resolution is None:
+			self._resolution = (None, None)
+			request_path = (frappe.local.request.path or "").strip("/")
+			spa_root = get_router().match(request_path)
+			if spa_root:
+				manifest = get_manifest(spa_root)
+				if manifest:
+					self._resolution = (manifest, manifest.resolve(request_path))
+		return self._resolution
 
 	def can_render(self):
-		if not self.path:
-			return False
-
-		spa_root = self._get_spa_root()
-		request_path = (frappe.local.request.path or "").strip("/")
-		if not request_path.startswith(spa_root):
-			return False
-
-		for app in frappe.get_installed_apps():
-			index_path = frappe.get_app_path(app, "www", spa_root, "index.html")
-			if os.path.isfile(index_path):
-				return True
-		return False
-
-	def _find_file(self, request_path):
-		"""Find the file to serve for the given request path."""
-		for app in frappe.get_installed_apps():
-			www_base = frappe.get_app_path(app, "www")
-			file_path = os.path.normpath(os.path.join(www_base, *request_path.split("/")))
-			if not file_path.startswith(www_base) or file_path.endswith(".py"):
-				continue
-			# Exact file match (CSS, JS, fonts, images)
-			if os.path.isfile(file_path):
-				return file_path
-			# Directory with index.html (e.g. /frontend/login → /frontend/login/index.html)
-			index_in_dir = os.path.join(file_path, "index.html")
-			if os.path.isfile(index_in_dir):
-				return index_in_dir
-		return None
+		manifest, entry = self.resolve()
+		if manifest is not None:
+			return True
+		# Inactive releases under www/.releases are not served (render() returns 404)
+		return (frappe.local.request.path or "").strip("/").split("/")[0] == RELEASES_DIR
 
 	def render(self):
-		request_path = (frappe.local.request.path or "").strip("/")
-		spa_root = self._get_spa_root()
-
-		if not request_path or request_path == spa_root or request_path.rstrip("/") == spa_root:
-			request_path = f"{spa_root}/index.html"
-
-		# Try to serve the exact file or directory index
-		file_path = self._find_file(request_path)
-		if file_path:
-			with open(file_path, "rb") as f:
-				data = f.read()
-			mimetype = mimetypes.guess_type(file_path)[0] or "text/html"
-			return Response(data, mimetype=mimetype)
-
-		# Fallback to root index.html for unmatched SPA routes
-		for app in frappe.get_installed_apps():
-			index_path = frappe.get_app_path(app, "www", spa_root, "index.html")
-			if os.path.isfile(index_path):
-				with open(index_path, "rb") as f:
-					return Response(f.read(), mimetype="text/html")
-		return Response("Not Found", status=404)
+		manifest, entry = self.resolve()
+		if not entry:
+			return Response("Not Found", status=404)
+
+		request = frappe.local.request
+		config = get_spa_config(manifest.spa_root)
+		if config["preload"] and config["early_hints"]:
+			send_early_hints(request, entry)
+
+		response = self.build_response(request, config, manifest, entry)
+		if config["preload"]:
+			add_preload_links(response, entry)
+		return response
+
+	def build_response(self, request, config, manifest, entry):
+		rel_path = request.path.strip("/")[len(manifest.spa_root) + 1 :]
+		cache_control = get_cache_control(config, rel_path, entry.mimetype)
+		if config["boot"] and entry.mimetype == "text/html":
+			return build_boot_response(request, get_content_cache(), manifest.stamp, entry, cache_control)
+
+		# nginx/Apache handle encoding, ranges and validators for offloaded files
+		response = offload_response(entry)
+		if response:
+			if cache_control:
+				response.headers["Cache-Control"] = cache_control
+			return response
+
+		return build_file_response(request, get_content_cache(), manifest.stamp, entry, cache_control)
@@ -0,0 +1,225 @@
+"""HTTP responses for exported SPA files - shared by SPAPage and the WSGI fast path."""
+
+import uuid
+from datetime import datetime, timezone
+
+from werkzeug.http import is_resource_modified, parse_if_range_header, parse_range_header
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import wrap_file
+
+from frappe_next_js.spa_manifest import ENCODING_SUFFIXES, compute_etag
+
+# Requests asking for more ranges than this get the whole file instead
+MAX_BYTE_RANGES = 16
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def read_file(cache, entry, stamp):
+	"""Return file contents from the asset pack or the worker cache, reading from disk only on a miss."""
+	if entry.pack is not None:
+		return entry.pack.read(entry.offset, entry.size)
+	validator = (stamp, entry.mtime, entry.size)
+	data = cache.get(entry.path, validator)
+	if data is None:
+		with open(entry.path, "rb") as f:
+			data = f.read()
+		cache.put(entry.path, validator, data)
+	return data
+
+
+def file_response(request, cache, entry, stamp, mimetype):
+	"""Build a 200 response for entry.
+
+	Packed files are served from the shared mapping and files that fit the content cache from
+	memory; larger ones are streamed through wsgi.file_wrapper so the server can use sendfile
+	instead of buffering them in the worker.
+	"""
+	if entry.pack is not None:
+		response = Response(
+			iter_file_ranges(entry, [(0, entry.size)]), mimetype=mimetype, direct_passthrough=True
+		)
+		response.content_length = entry.size
+		return response
+	if cache.cacheable(entry.size):
+		return Response(read_file(cache, entry, stamp), mimetype=mimetype)
+
+	response = Response(
+		wrap_file(request.environ, open(entry.path, "rb")),
+		mimetype=mimetype,
+		direct_passthrough=True,
+	)
+	response.content_length = entry.size
+	return response
+
+
+def get_byte_ranges(request, entry, etag, last_modified):
+	"""Resolve the request's Range header against entry.
+
+	Returns None to serve the whole file (no usable Range, or a stale If-Range),
+	an empty list if no range is satisfiable, else a list of (start, stop) offsets.
+	"""
+	environ = request.environ
+	byte_range = parse_range_header(environ.get("HTTP_RANGE"))
+	if byte_range is None or byte_range.units != "bytes" or len(byte_range.ranges) > MAX_BYTE_RANGES:
+		return None
+
+	if_range = parse_if_range_header(environ.get("HTTP_IF_RANGE"))
+	if if_range.etag is not None and if_range.etag != etag:
+		return None
+	if if_range.date is not None and if_range.date != last_modified.replace(microsecond=0):
+		return None
+
+	ranges = []
+	for start, stop in byte_range.ranges:
+		if start < 0:
+			start, stop = max(entry.size + start, 0), entry.size
+		else:
+			stop = entry.size if stop is None else min(stop, entry.size)
+		if start < stop:
+			ranges.append((start, stop))
+
+	# Overlapping ranges that add up to more than the file are cheaper to serve whole
+	if sum(stop - start for start, stop in ranges) > entry.size:
+		return None
+	return ranges
+
+
+def iter_pack_ranges(entry, ranges, parts=None):
+	for i, (start, stop) in enumerate(ranges):
+		if parts:
+			yield parts[i][0]
+		for chunk_start in range(start, stop, RANGE_CHUNK_SIZE):
+			yield entry.pack.read(entry.offset + chunk_start, min(RANGE_CHUNK_SIZE, stop - chunk_start))
+		if parts:
+			yield parts[i][1]
+
+
+def iter_file_ranges(entry, ranges, parts=None):
+	"""Yield the requested byte ranges of a file without reading the rest of it.
+
+	parts, if given, is a list of (part header, part trailer) bytes to wrap each range in.
+	"""
+	if entry.pack is not None:
+		yield from iter_pack_ranges(entry, ranges, parts)
+		return
+
+	with open(entry.path, "rb") as f:
+		for i, (start, stop) in enumerate(ranges):
+			if parts:
+				yield parts[i][0]
+			f.seek(start)
+			remaining = stop - start
+			while remaining > 0:
+				chunk = f.read(min(RANGE_CHUNK_SIZE, remaining))
+				if not chunk:
+					break
+				remaining -= len(chunk)
+				yield chunk
+			if parts:
+				yield parts[i][1]
+
+
+def partial_response(cache, entry, stamp, mimetype, ranges):
+	"""Build a 206 response for one range, or multipart/byteranges for several."""
+	data = read_file(cache, entry, stamp) if entry.pack is None and cache.cacheable(entry.size) else None
+
+	if len(ranges) == 1:
+		start, stop = ranges[0]
+		body = [data[start:stop]] if data is not None else iter_file_ranges(entry, ranges)
+		response = Response(body, status=206, mimetype=mimetype, direct_passthrough=True)
+		response.content_range = f"bytes {start}-{stop - 1}/{entry.size}"
+		response.content_length = stop - start
+		return response
+
+	boundary = uuid.uuid4().hex
+	parts = [
+		(
+			(
+				f"--{boundary}\r\nContent-Type: {mimetype}\r\n"
+				f"Content-Range: bytes {start}-{stop - 1}/{entry.size}\r\n\r\n"
+			).encode(),
+			b"\r\n",
+		)
+		for start, stop in ranges
+	]
+	closing = f"--{boundary}--\r\n".encode()
+	if data is not None:
+		body = [header + data[start:stop] + trailer for (header, trailer), (start, stop) in zip(parts, ranges)]
+	else:
+		body = iter_file_ranges(entry, ranges, parts)
+
+	def multipart_body():
+		yield from body
+		yield closing
+
+	response = Response(multipart_body(), status=206, direct_passthrough=True)
+	response.content_type = f"multipart/byteranges; boundary={boundary}"
+	response.content_length = (
+		sum(len(header) + len(trailer) for header, trailer in parts)
+		+ sum(stop - start for start, stop in ranges)
+		+ len(closing)
+	)
+	return response
+
+
+def select_encoding(request, entry):
+	"""Pick the best precompressed variant the client accepts. Returns (entry to serve, content encoding)."""
+	if not entry.encodings:
+		return entry, None
+	available = [encoding for encoding in ENCODING_SUFFIXES.values() if encoding in entry.encodings]
+	encoding = request.accept_encodings.best_match(available)
+	if encoding:
+		return entry.encodings[encoding], encoding
+	return entry, None
+
+
+def get_etag(entry):
+	"""Return the entry's strong ETag, hashing the file once if the export did not record it."""
+	if entry.etag is None:
+		entry.etag = compute_etag(entry.path)
+	return entry.etag
+
+
+def send_early_hints(request, entry):
+	"""Send a 103 Early Hints response with the entry's preload links, if the WSGI server offers a way to.
+
+	There is no standard WSGI API for interim responses; servers that support them expose
+	a callable as environ["wsgi.early_hints"] taking a list of (name, value) headers.
+	"""
+	early_hints = request.environ.get("wsgi.early_hints")
+	if entry.links and callable(early_hints):
+		early_hints([("Link", entry.links)])
+
+
+def add_preload_links(response, entry):
+	"""Advertise the critical assets of an HTML page so the browser fetches them alongside the HTML."""
+	if entry.links and response.status_code == 200:
+		response.headers["Link"] = entry.links
+
+
+def build_file_response(request, cache, stamp, entry, cache_control=None):
+	"""Serve entry for request: content negotiation, conditional and range handling."""
+	variant, encoding = select_encoding(request, entry)
+	etag = get_etag(variant)
+	last_modified = datetime.fromtimestamp(entry.mtime, tz=timezone.utc)
+	if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+		response = Response(status=304)
+	else:
+		ranges = get_byte_ranges(request, variant, etag, last_modified)
+		if ranges is None:
+			response = file_response(request, cache, variant, stamp, entry.mimetype)
+		elif ranges:
+			response = partial_response(cache, variant, stamp, entry.mimetype, ranges)
+		else:
+			response = Response(status=416)
+			response.content_range = f"bytes */{variant.size}"
+	response.accept_ranges = "bytes"
+	if encoding:
+		response.content_encoding = encoding
+	if entry.encodings:
+		response.vary.add("Accept-Encoding")
+	response.set_etag(etag)
+	response.last_modified = last_modified
+	if cache_control:
+		response.headers["Cache-Control"] = cache_control
+	return response
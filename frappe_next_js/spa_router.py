@@ -0,0 +1,38 @@
+"""Longest-prefix matching of request paths against SPA mount points."""
+
+# Trie key marking the end of a mount point (path segments are always strings)
+MOUNT = None
+
+
+class SPARouter:
+	"""Segment trie of SPA mount points, e.g. "frontend" and "portal/app".
+
+	Matching a path walks at most one node per segment and never touches the filesystem.
+	"""
+
+	def __init__(self, mounts=()):
+		self.root = {}
+		self.mounts = set()
+		for mount in mounts:
+			self.add(mount)
+
+	def add(self, mount):
+		mount = mount.strip("/")
+		if not mount:
+			return
+		node = self.root
+		for segment in mount.split("/"):
+			node = node.setdefault(segment, {})
+		node[MOUNT] = mount
+		self.mounts.add(mount)
+
+	def match(self, request_path):
+		"""Return the longest mount point that request_path (without leading slash) falls under, or None."""
+		node = self.root
+		match = None
+		for segment in request_path.split("/"):
+			node = node.get(segment)
+			if node is None:
+				break
+			match = node.get(MOUNT, match)
+		return match
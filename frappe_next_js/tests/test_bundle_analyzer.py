@@ -0,0 +1,85 @@
+"""
+Tests for the per-route bundle size analyzer
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+
+class TestBundleAnalyzer(unittest.TestCase):
+    """Test cases for first-load sizes, budgets and history."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        bench = Path(self.tmp.name)
+        (bench / "sites").mkdir()
+        self.spa = bench / "apps" / "my_app" / "frontend"
+        chunks = self.spa / ".next" / "static" / "chunks"
+        (chunks / "app" / "orders").mkdir(parents=True)
+        (self.spa / ".next" / "static" / "css").mkdir(parents=True)
+        for name, size in (
+            ("main-app.js", 4000),
+            ("polyfills.js", 9000),
+            ("app/layout.js", 1000),
+            ("app/page.js", 500),
+            ("app/orders/page.js", 3000),
+        ):
+            (chunks / name).write_bytes(os.urandom(size))
+        (self.spa / ".next" / "static" / "css" / "app.css").write_text("body { color: red; }" * 50)
+        (self.spa / ".next" / "BUILD_ID").write_text("b1")
+        self.write_json(
+            ".next/build-manifest.json",
+            {"pages": {}, "rootMainFiles": ["static/chunks/main-app.js"], "polyfillFiles": ["static/chunks/polyfills.js"]},
+        )
+        self.write_json(
+            ".next/app-build-manifest.json",
+            {
+                "pages": {
+                    "/layout": ["static/chunks/app/layout.js", "static/css/app.css"],
+                    "/page": ["static/chunks/app/page.js"],
+                    "/(shop)/orders/page": ["static/chunks/app/orders/page.js"],
+                }
+            },
+        )
+        os.chdir(bench / "sites")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write_json(self, rel_path, data):
+        (self.spa / rel_path).write_text(json.dumps(data))
+
+    def test_first_load_per_route(self):
+        """Test that each route counts the root, layout and page chunks but not polyfills."""
+        from frappe_next_js.commands.bundle_analyzer import NextJSBundleAnalyzer
+
+        routes = NextJSBundleAnalyzer("my_app", "frontend").analyze()
+
+        self.assertEqual(sorted(routes), ["/", "/orders"])
+        self.assertEqual(routes["/"]["js"]["raw"], 5500)
+        self.assertEqual(routes["/orders"]["js"]["raw"], 8000)
+        self.assertEqual(routes["/orders"]["css"]["raw"], 1000)
+        self.assertLess(routes["/orders"]["css"]["gzip"], 1000)
+
+    def test_budgets_and_history(self):
+        """Test that budgets fail the run and each build is recorded once in the history."""
+        from frappe_next_js.commands.bundle_analyzer import HISTORY_FILE, NextJSBundleAnalyzer
+
+        self.write_json("bundle-budgets.json", {"default": {"js": 100}, "routes": {"/ord*": {"js": 7}}})
+        analyzer = NextJSBundleAnalyzer("my_app", "frontend")
+        exceeded = analyzer.run()
+        analyzer.run()
+
+        self.assertEqual([(route, kind) for route, kind, _, _ in exceeded], [("/orders", "js")])
+        history = json.loads((self.spa / HISTORY_FILE).read_text())
+        self.assertEqual([entry["build_id"] for entry in history], ["b1"])
+        self.assertIn("/orders", history[0]["routes"])
+
+
+if __name__ == "__main__":
+    unittest.main()
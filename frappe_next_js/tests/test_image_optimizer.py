@@ -0,0 +1,98 @@
+"""
+Tests for build-time image variants
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class TestImageOptimizer(unittest.TestCase):
+    """Test cases for variant generation and the content hash cache."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = Path(self.tmp.name) / "out"
+        (self.out / "images").mkdir(parents=True)
+        Image.new("RGB", (700, 350), "red").save(self.out / "images" / "hero.png")
+        Image.new("P", (40, 40)).save(self.out / "images" / "icon.png", transparency=0)
+        (self.out / "logo.svg").write_text("<svg/>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def optimize(self):
+        from frappe_next_js.commands.image_optimizer import ImageOptimizer
+
+        optimizer = ImageOptimizer(self.out, cache_path=Path(self.tmp.name) / "cache", jobs=2)
+        with patch.object(optimizer, "formats", ("webp",)):
+            return optimizer.optimize()
+
+    def test_variants(self):
+        """Test that each standard width gets a variant, without upscaling past the original."""
+        self.assertEqual(self.optimize(), (2, 2))
+
+        variants = self.out / "images" / "_img"
+        with Image.open(variants / "640" / "hero.png.webp") as image:
+            self.assertEqual(image.size, (640, 320))
+        with Image.open(variants / "1080" / "hero.png.webp") as image:
+            self.assertEqual(image.size, (700, 350))
+        with Image.open(variants / "16" / "icon.png.webp") as image:
+            self.assertEqual(image.mode, "RGBA")
+        self.assertFalse((self.out / "_img").exists())
+
+    def test_find_missing(self):
+        """Test that images without their WebP variants are reported."""
+        from frappe_next_js.commands.image_optimizer import ImageOptimizer
+
+        optimizer = ImageOptimizer(self.out, cache_path=Path(self.tmp.name) / "cache")
+        self.assertEqual(len(optimizer.find_missing()), 2)
+        self.optimize()
+        self.assertEqual(optimizer.find_missing(), [])
+
+        os.unlink(self.out / "images" / "_img" / "3840" / "hero.png.webp")
+        self.assertEqual(optimizer.find_missing(), [self.out / "images" / "hero.png"])
+
+    def test_export_fails_without_webp(self):
+        """Test that nextjs-export fails rather than ship a loader pointing at missing variants."""
+        from frappe_next_js.commands import image_optimizer
+        from frappe_next_js.commands.nextjs_exporter import NextJSExporter
+
+        bench = Path(self.tmp.name)
+        (bench / "apps" / "my_app" / "frontend").mkdir(parents=True)
+        self.out.rename(bench / "apps" / "my_app" / "frontend" / "out")
+        (bench / "apps" / "my_app" / "frontend" / "out" / "index.html").write_text("<html></html>")
+        (bench / "sites").mkdir()
+
+        cwd = os.getcwd()
+        os.chdir(bench / "sites")
+        try:
+            with patch.object(image_optimizer, "get_image_formats", return_value=()):
+                with self.assertRaises(SystemExit):
+                    NextJSExporter("my_app", "frontend").optimize_images()
+        finally:
+            os.chdir(cwd)
+
+    def test_cache(self):
+        """Test that unchanged images are linked from the cache instead of encoded again."""
+        self.optimize()
+        variant = self.out / "images" / "_img" / "640" / "hero.png.webp"
+        os.unlink(variant)
+
+        self.assertEqual(self.optimize(), (2, 0))
+        self.assertTrue(variant.is_file())
+
+        Image.new("RGB", (700, 350), "blue").save(self.out / "images" / "hero.png")
+        self.assertEqual(self.optimize(), (2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
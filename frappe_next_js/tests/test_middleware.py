@@ -0,0 +1,96 @@
+"""
+Tests for the WSGI fast path middleware
+"""
+
+import os
+import sys
+import tempfile
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+class TestSPAStaticMiddleware(unittest.TestCase):
+    """Test cases for SPAStaticMiddleware."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        app_root = os.path.join(self.tmp.name, "apps", "nextjs_test_app")
+        package = os.path.join(app_root, "nextjs_test_app")
+        os.makedirs(os.path.join(package, "www", "frontend"))
+        open(os.path.join(package, "__init__.py"), "w").close()
+        with open(os.path.join(package, "hooks.py"), "w") as f:
+            f.write('nextjs_spas = {"frontend": {"boot": False}, "portal": {}}\n')
+        os.makedirs(os.path.join(package, "www", "portal"))
+        for spa in ("frontend", "portal"):
+            with open(os.path.join(package, "www", spa, "index.html"), "w") as f:
+                f.write("<html>home</html>")
+
+        sites = os.path.join(self.tmp.name, "sites")
+        for site in ("site1.local", "site2.local"):
+            os.makedirs(os.path.join(sites, site))
+            with open(os.path.join(sites, site, "site_config.json"), "w") as f:
+                json.dump({"db_name": site.replace(".", "_")}, f)
+        sys.path.insert(0, app_root)
+
+        # Only site1 has the app installed
+        site_apps = {"site1.local": ["frappe", "nextjs_test_app"], "site2.local": ["frappe"]}
+        self.get_site_apps = patch(
+            "frappe_next_js.middleware.get_site_apps", side_effect=lambda sites_path, site: site_apps[site]
+        ).start()
+
+        from frappe_next_js.middleware import SPAStaticMiddleware
+
+        def frappe_app(environ, start_response):
+            start_response("200 OK", [])
+            return [b"frappe"]
+
+        self.frappe_app = MagicMock(side_effect=frappe_app)
+        self.middleware = SPAStaticMiddleware(self.frappe_app, sites_path=sites)
+
+    def tearDown(self):
+        patch.stopall()
+        sys.path.remove(os.path.join(self.tmp.name, "apps", "nextjs_test_app"))
+        sys.modules.pop("nextjs_test_app.hooks", None)
+        sys.modules.pop("nextjs_test_app", None)
+        self.tmp.cleanup()
+
+    def get(self, path, host="site1.local", **headers):
+        from werkzeug.test import Client
+
+        return Client(self.middleware).get(path, headers={"Host": f"{host}:8000", **headers})
+
+    def test_serves_static_hit_without_frappe(self):
+        """Test that an exported file is answered by the middleware."""
+        response = self.get("/frontend/")
+
+        self.assertEqual(response.get_data(), b"<html>home</html>")
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+        self.frappe_app.assert_not_called()
+
+    def test_falls_through_for_other_paths(self):
+        """Test that non-SPA paths, deep links and shells with boot data go to Frappe."""
+        self.get("/api/method/ping")
+        self.get("/frontend/orders/123")
+        self.get("/portal/")
+
+        self.assertEqual(self.frappe_app.call_count, 3)
+
+    def test_resolves_site_per_request(self):
+        """Test that only sites with the app installed are served, and unknown sites go to Frappe."""
+        self.assertEqual(self.get("/frontend/").get_data(), b"<html>home</html>")
+        self.get("/frontend/", host="127.0.0.1", **{"X-Frappe-Site-Name": "site1.local"})
+        self.frappe_app.assert_not_called()
+
+        self.get("/frontend/", host="site2.local")
+        self.get("/frontend/", host="unknown.local")
+        self.get("/frontend/", host="..")
+        self.assertEqual(self.frappe_app.call_count, 3)
+
+        self.get("/frontend/")
+        self.get("/frontend/", host="site2.local")
+        self.assertEqual(self.get_site_apps.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Tests for the parallel frontend builder
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+class TestNextJSBuilder(unittest.TestCase):
+    """Test cases for frontend discovery and the build pool."""
+
+    def test_find_frontends(self):
+        """Test that only directories with a build:frappe script are frontends."""
+        from frappe_next_js.commands.nextjs_builder import find_frontends
+
+        with tempfile.TemporaryDirectory() as tmp:
+            apps = Path(tmp)
+            for app, spa, scripts in (
+                ("app_a", "frontend", {"build:frappe": "next build"}),
+                ("app_a", "docs", {"build": "vitepress build"}),
+                ("app_b", "portal", {"build:frappe": "next build"}),
+            ):
+                (apps / app / spa).mkdir(parents=True)
+                (apps / app / spa / "package.json").write_text(json.dumps({"scripts": scripts}))
+
+            self.assertEqual(
+                find_frontends(apps, ["app_a", "app_b", "missing"]),
+                [("app_a", "frontend"), ("app_b", "portal")],
+            )
+
+    def test_pool_size(self):
+        """Test that the pool is bounded by cores, memory and frontend count."""
+        from frappe_next_js.commands import nextjs_builder
+
+        gib = 1024**3
+        with patch("os.cpu_count", return_value=8), patch.object(
+            nextjs_builder, "get_available_memory", return_value=5 * gib
+        ):
+            self.assertEqual(nextjs_builder.get_pool_size(6), 2)
+            self.assertEqual(nextjs_builder.get_pool_size(1), 1)
+
+        with patch("os.cpu_count", return_value=2), patch.object(
+            nextjs_builder, "get_available_memory", return_value=None
+        ):
+            self.assertEqual(nextjs_builder.get_pool_size(6), 2)
+
+    def test_build_reports_failures(self):
+        """Test that every frontend is built and failures are reported."""
+        from frappe_next_js.commands.nextjs_builder import NextJSBuilder
+
+        with tempfile.TemporaryDirectory() as tmp, patch(
+            "frappe_next_js.commands.nextjs_builder.find_frontends", return_value=[("a", "ok"), ("a", "bad")]
+        ):
+            builder = NextJSBuilder(apps=["a"], jobs=2)
+            builder.apps_path = Path(tmp)
+            for spa in ("ok", "bad"):
+                (Path(tmp) / "a" / spa).mkdir(parents=True)
+            with patch.object(builder, "get_build_command", return_value='test "$(basename $PWD)" = ok'):
+                results = builder.build()
+
+        self.assertEqual([result["returncode"] != 0 for result in results], [False, True])
+
+    def test_build_key(self):
+        """Test that the build key changes with sources and public env, not with build output."""
+        from frappe_next_js.commands.build_cache import compute_build_key
+
+        with tempfile.TemporaryDirectory() as tmp:
+            spa = Path(tmp)
+            (spa / "src" / "app").mkdir(parents=True)
+            (spa / "src" / "app" / "page.tsx").write_text("export default 1")
+            (spa / "package.json").write_text("{}")
+            key = compute_build_key(spa)
+
+            (spa / "out").mkdir()
+            (spa / "out" / "index.html").write_text("<html></html>")
+            self.assertEqual(compute_build_key(spa), key)
+
+            with patch.dict("os.environ", {"NEXT_PUBLIC_SITE": "x"}):
+                self.assertNotEqual(compute_build_key(spa), key)
+
+            (spa / "src" / "app" / "page.tsx").write_text("export default 2")
+            self.assertNotEqual(compute_build_key(spa), key)
+
+    def test_cache_hit_skips_build(self):
+        """Test that a second build with unchanged sources restores the cached export."""
+        from frappe_next_js.commands.nextjs_builder import NextJSBuilder
+
+        with tempfile.TemporaryDirectory() as tmp, patch(
+            "frappe_next_js.commands.nextjs_builder.find_frontends", return_value=[("a", "frontend")]
+        ):
+            builder = NextJSBuilder(apps=["a"], jobs=1)
+            builder.apps_path = Path(tmp)
+            builder.cache_path = Path(tmp) / "cache"
+            spa = Path(tmp) / "a" / "frontend"
+            (spa / "src").mkdir(parents=True)
+            (spa / "src" / "page.tsx").write_text("export default 1")
+            build = "mkdir -p out .next && echo built > out/index.html && echo b1 > .next/BUILD_ID && echo ran >> log"
+
+            with patch.object(builder, "get_build_command", return_value=build), patch.object(
+                builder, "is_deployed", return_value=True
+            ):
+                first = builder.build()
+                (spa / "out" / "index.html").unlink()
+                second = builder.build()
+
+            self.assertEqual([first[0]["cached"], second[0]["cached"]], [False, True])
+            self.assertEqual((spa / "log").read_text(), "ran\n")
+            self.assertEqual((spa / "out" / "index.html").read_text(), "built\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Tests for the Next.js export post-processing
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+
+class TestNextJSExporter(unittest.TestCase):
+    """Test cases for the export helpers."""
+
+    def test_get_critical_assets(self):
+        """Test that stylesheets, scripts and fonts are collected in document order."""
+        from frappe_next_js.commands.nextjs_exporter import get_critical_assets
+
+        html = (
+            '<html><head><link rel="preload" href="/f.woff2" as="font" crossorigin="" type="font/woff2">'
+            '<link rel="stylesheet" href="/app.css"><script src="/polyfills.js" noModule=""></script>'
+            '<script src="/main.js" async=""></script><script src="/main.js"></script>'
+            '<script type="module" src="/entry.mjs"></script></head><body></body></html>'
+        )
+
+        self.assertEqual(
+            get_critical_assets(html),
+            [
+                {"href": "/f.woff2", "rel": "preload", "as": "font", "crossorigin": True},
+                {"href": "/app.css", "rel": "preload", "as": "style"},
+                {"href": "/main.js", "rel": "preload", "as": "script"},
+                {"href": "/entry.mjs", "rel": "modulepreload"},
+            ],
+        )
+
+    def test_rewrite_and_validate_asset_paths(self):
+        """Test that old /<spa>/_next/ references are rewritten and missing chunks fail the export."""
+        from frappe_next_js.commands.nextjs_exporter import NextJSExporter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            package = Path(tmp) / "apps" / "my_app" / "my_app"
+            (package / "www" / "frontend").mkdir(parents=True)
+            (package / "public" / "frontend" / "_next" / "static").mkdir(parents=True)
+            (package / "public" / "frontend" / "_next" / "static" / "a.js").write_text("")
+            (package / "www" / "frontend" / "index.html").write_text(
+                '<script src="/frontend/_next/static/a.js"></script>'
+                '<script src="/assets/my_app/frontend/_next/static/a.js"></script>'
+            )
+            (Path(tmp) / "sites").mkdir()
+
+            cwd = os.getcwd()
+            os.chdir(Path(tmp) / "sites")
+            try:
+                exporter = NextJSExporter("my_app", "frontend")
+                exporter.rewrite_asset_paths()
+                exporter.validate_asset_references()
+
+                (package / "public" / "frontend" / "_next" / "static" / "a.js").unlink()
+                with self.assertRaises(SystemExit):
+                    exporter.validate_asset_references()
+            finally:
+                os.chdir(cwd)
+
+            self.assertEqual(
+                (package / "www" / "frontend" / "index.html").read_text(),
+                '<script src="/assets/my_app/frontend/_next/static/a.js"></script>' * 2,
+            )
+
+    def test_sync_manifest_is_private(self):
+        """Test that the sync manifest's source hashes are neither compressed nor served."""
+        import json
+        from frappe_next_js.commands.nextjs_exporter import NextJSExporter
+        from frappe_next_js.spa_manifest import SYNC_MANIFEST_FILE, scan_files
+
+        with tempfile.TemporaryDirectory() as tmp:
+            spa_dir = Path(tmp) / "apps" / "my_app" / "my_app" / "www" / "frontend"
+            spa_dir.mkdir(parents=True)
+            (spa_dir / "index.html").write_text("<html>home</html>")
+            hashes = {f"page-{i}/index.html": "0" * 40 for i in range(50)}
+            (spa_dir / SYNC_MANIFEST_FILE).write_text(json.dumps(hashes, indent=1))
+            (Path(tmp) / "sites").mkdir()
+
+            cwd = os.getcwd()
+            os.chdir(Path(tmp) / "sites")
+            try:
+                NextJSExporter("my_app", "frontend").precompress()
+            finally:
+                os.chdir(cwd)
+
+            self.assertEqual(sorted(path.name for path in spa_dir.iterdir()), [SYNC_MANIFEST_FILE, "index.html"])
+            self.assertEqual(list(scan_files(str(spa_dir))), ["index.html"])
+
+    def test_releases(self):
+        """Test release staging with hardlinks, the symlink swap, rollback and pruning."""
+        from frappe_next_js.commands.nextjs_exporter import NextJSExporter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "apps" / "my_app" / "frontend" / "out"
+            (out / "_next" / "static").mkdir(parents=True)
+            (out / "index.html").write_text("<html>home</html>")
+            (out / "about.html").write_text("<html>about</html>")
+            (out / "_next" / "static" / "a.js").write_text("a")
+            (Path(tmp) / "apps" / "my_app" / "my_app").mkdir()
+            (Path(tmp) / "apps" / "my_app" / ".gitignore").write_text("node_modules\nmy_app/www/frontend\n")
+            (Path(tmp) / "sites").mkdir()
+            www = Path(tmp) / "apps" / "my_app" / "my_app" / "www"
+            chunks = Path(tmp) / "apps" / "my_app" / "my_app" / "public" / "frontend" / "_next" / "static"
+
+            cwd = os.getcwd()
+            os.chdir(Path(tmp) / "sites")
+            try:
+                with patch("time.time", return_value=1):
+                    NextJSExporter("my_app", "frontend").export()
+                first = (www / "frontend").resolve()
+
+                (out / "index.html").write_text("<html>new home</html>")
+                (out / "_next" / "static" / "a.js").unlink()
+                (out / "_next" / "static" / "b.js").write_text("b")
+                with patch("time.time", return_value=2):
+                    NextJSExporter("my_app", "frontend").export()
+                second = (www / "frontend").resolve()
+
+                self.assertTrue((www / "frontend").is_symlink())
+                self.assertEqual((www / "frontend" / "index.html").read_text(), "<html>new home</html>")
+                self.assertEqual((first / "about.html").stat().st_ino, (second / "about.html").stat().st_ino)
+                self.assertTrue((chunks / "a.js").is_file())
+                self.assertTrue((second / ".nextjs-pack").is_file())
+                self.assertFalse((first / ".nextjs-pack").exists())
+
+                # Touching an older release must not make it the newest
+                os.utime(first, (4_000_000_000, 4_000_000_000))
+                NextJSExporter("my_app", "frontend").rollback()
+                self.assertEqual((www / "frontend" / "index.html").read_text(), "<html>home</html>")
+                NextJSExporter("my_app", "frontend").rollback(second.name)
+
+                (out / "about.html").unlink()
+                with patch("time.time", return_value=3):
+                    NextJSExporter("my_app", "frontend").export(keep_releases=1)
+            finally:
+                os.chdir(cwd)
+
+            self.assertEqual([path.name for path in (www / ".releases" / "frontend").iterdir()], ["3"])
+            self.assertFalse((www / "frontend" / "about.html").exists())
+            self.assertFalse((chunks / "a.js").exists())
+            self.assertTrue((chunks / "b.js").is_file())
+            self.assertEqual(
+                (Path(tmp) / "apps" / "my_app" / ".gitignore").read_text().splitlines(),
+                ["node_modules", "my_app/www/frontend", "my_app/www/.releases"],
+            )
+
+if __name__ == "__main__":
+    unittest.main()
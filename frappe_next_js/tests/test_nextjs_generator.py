@@ -39,6 +39,29 @@ class TestNextJSGenerator(unittest.TestCase):
                 tailwindcss=True,
             )
 
+    def test_spa_page_controller_html_cache(self):
+        """Test that the page controller reads each file version once."""
+        import os
+        import tempfile
+        from frappe_next_js.commands.boilerplates import SPA_PAGE_PY
+
+        source = SPA_PAGE_PY.replace("{{ app_package }}", "my_app").replace("{{ spa_name }}", "frontend")
+        controller = {}
+        exec(source, controller)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            html_path = os.path.join(tmp, "index.html")
+            with open(html_path, "w") as f:
+                f.write('<html><head><script src="/frontend/_next/a.js"></script></head></html>')
+
+            with patch("builtins.open", wraps=open) as mock_open:
+                html, offset = controller["load_html"](html_path)
+                self.assertEqual(controller["load_html"](html_path), (html, offset))
+                self.assertEqual(mock_open.call_count, 1)
+
+            self.assertIn('"/frontend/_next/a.js"', html)
+            self.assertEqual(html[offset:], '<script src="/frontend/_next/a.js"></script></head></html>')
+
 
 class TestUtils(unittest.TestCase):
     """Test cases for utility functions."""
@@ -51,6 +74,32 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(get_app_package_name("my_app"), "my_app")
         self.assertEqual(get_app_package_name("myapp"), "myapp")
 
+    def test_add_routing_rule_to_hooks(self):
+        """Test that the route rule and nextjs_spas entry are added once."""
+        import os
+        import tempfile
+        from frappe_next_js.commands.utils import add_routing_rule_to_hooks
+
+        with tempfile.TemporaryDirectory() as tmp:
+            hooks_path = Path(tmp) / "apps" / "my_app" / "my_app" / "hooks.py"
+            hooks_path.parent.mkdir(parents=True)
+            hooks_path.write_text('app_name = "my_app"\n')
+            (Path(tmp) / "sites").mkdir()
+
+            cwd = os.getcwd()
+            os.chdir(Path(tmp) / "sites")
+            try:
+                add_routing_rule_to_hooks("my_app", "frontend")
+                add_routing_rule_to_hooks("my_app", "frontend")
+                add_routing_rule_to_hooks("my_app", "portal")
+            finally:
+                os.chdir(cwd)
+
+            hooks = {}
+            exec(hooks_path.read_text(), hooks)
+            self.assertEqual(hooks["nextjs_spas"], {"frontend": {}, "portal": {}})
+            self.assertEqual(len(hooks["website_route_rules"]), 2)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,120 @@
+"""
+Tests for syncing out/ into the live export in watch mode
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+
+class TestNextJSWatcher(unittest.TestCase):
+    """Test cases for incremental sync."""
+
+    def test_sync_changed_files(self):
+        """Test that only changed files are copied, removed pages are deleted and a new build is stamped."""
+        from frappe_next_js.commands.nextjs_watcher import NextJSWatcher, snapshot
+        from frappe_next_js.spa_manifest import BUILD_STAMP_FILE, MANIFEST_FILE
+        from frappe_next_js.spa_pack import PACK_FILE
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "apps" / "my_app" / "frontend" / "out"
+            (out / "_next" / "static").mkdir(parents=True)
+            (out / "index.html").write_text("<html>home</html>")
+            (out / "about.html").write_text("<html>about</html>")
+            (out / "faq.html").write_text("<html>faq</html>")
+            (out / "data.json").write_text('{"items": [%s]}' % ", ".join(["1"] * 1500))
+            (out / "_next" / "static" / "a.js").write_text("a")
+            package = Path(tmp) / "apps" / "my_app" / "my_app"
+            package.mkdir()
+            (Path(tmp) / "sites").mkdir()
+
+            cwd = os.getcwd()
+            os.chdir(Path(tmp) / "sites")
+            try:
+                watcher = NextJSWatcher("my_app", "frontend", build=False)
+                watcher.exporter.export()
+                live = package / "www" / "frontend"
+                release = Path(os.path.realpath(live))
+                watcher.exporter.www_path = release
+                stamp = (live / BUILD_STAMP_FILE).read_text()
+                previous = snapshot(out)
+                faq_inode = (live / "faq.html").stat().st_ino
+                self.assertTrue((live / "data.json.gz").is_file())
+
+                (out / "index.html").write_text('<html><script src="/frontend/_next/static/b.js"></script></html>')
+                (out / "about.html").unlink()
+                (out / "contact.html").write_text("<html>contact</html>")
+                (out / "data.json").write_text('{"a": 1}')
+                (out / "_next" / "static" / "b.js").write_text("b")
+                os.utime(out / "faq.html", (1, 1))
+                watcher.sync(previous, snapshot(out))
+            finally:
+                os.chdir(cwd)
+
+            self.assertEqual(Path(os.path.realpath(live)), release)
+            self.assertEqual(
+                (live / "index.html").read_text(),
+                '<html><script src="/assets/my_app/frontend/_next/static/b.js"></script></html>',
+            )
+            self.assertFalse((live / "about.html").exists())
+            self.assertTrue((live / "contact.html").is_file())
+            self.assertTrue((package / "public" / "frontend" / "_next" / "static" / "b.js").is_file())
+            self.assertNotEqual((live / BUILD_STAMP_FILE).read_text(), stamp)
+            self.assertIn("contact.html", (live / MANIFEST_FILE).read_text())
+            self.assertFalse((live / PACK_FILE).exists())
+            self.assertEqual((live / "faq.html").stat().st_ino, faq_inode)
+            self.assertEqual((live / "data.json").read_text(), '{"a": 1}')
+            self.assertFalse((live / "data.json.gz").exists())
+
+    def test_event_changes(self):
+        """Test that watchdog events are sorted into source changes and out/ paths, without scanning."""
+        from types import SimpleNamespace
+        from frappe_next_js.commands.nextjs_watcher import NextJSWatcher, update_snapshot
+
+        with tempfile.TemporaryDirectory() as tmp:
+            spa = Path(tmp) / "apps" / "my_app" / "frontend"
+            (spa / "out").mkdir(parents=True)
+            (spa / "out" / "index.html").write_text("<html>home</html>")
+            (Path(tmp) / "sites").mkdir()
+
+            cwd = os.getcwd()
+            os.chdir(Path(tmp) / "sites")
+            try:
+                watcher = NextJSWatcher("my_app", "frontend", build=False)
+            finally:
+                os.chdir(cwd)
+            spa = watcher.spa_path
+
+            def event(event_type, path, is_directory=False, dest=""):
+                return SimpleNamespace(
+                    event_type=event_type, src_path=str(spa / path), dest_path=dest and str(spa / dest),
+                    is_directory=is_directory,
+                )
+
+            # The first pass rescans out/
+            self.assertEqual(watcher.take_changes(), (False, None))
+
+            watcher.on_event(event("modified", "out/index.html"))
+            watcher.on_event(event("moved", "out/.about.html.tmp", dest="out/about.html"))
+            watcher.on_event(event("closed", "out/faq.html"))
+            watcher.on_event(event("modified", "out", is_directory=True))
+            watcher.on_event(event("modified", ".next/BUILD_ID"))
+            self.assertTrue(watcher.changed.is_set())
+            self.assertEqual(watcher.take_changes(), (False, {"index.html", ".about.html.tmp", "about.html"}))
+
+            watcher.on_event(event("modified", "src/app/page.tsx"))
+            watcher.on_event(event("created", "next.config.ts"))
+            self.assertEqual(watcher.take_changes(), (True, set()))
+
+            watcher.on_event(event("created", "out", is_directory=True))
+            self.assertEqual(watcher.take_changes(), (False, None))
+
+            synced = {"index.html": (1, 1), "gone.html": (1, 1)}
+            current = update_snapshot(Path(tmp) / "apps" / "my_app" / "frontend" / "out", synced, {"index.html", "gone.html"})
+            self.assertEqual(list(current), ["index.html"])
+            self.assertEqual(current["index.html"][0], len("<html>home</html>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+"""
+Tests for the SPA serving caches
+"""
+
+import unittest
+
+
+class TestContentCache(unittest.TestCase):
+    """Test cases for ContentCache."""
+
+    def test_lru_eviction_by_bytes(self):
+        """Test that the least recently used entries are evicted to stay within budget."""
+        from frappe_next_js.spa_cache import ContentCache
+
+        cache = ContentCache(max_bytes=10, max_file_bytes=10)
+        cache.put("a", 1, b"aaaa")
+        cache.put("b", 1, b"bbbb")
+        cache.get("a", 1)
+        cache.put("c", 1, b"cccc")
+
+        self.assertEqual(cache.get("a", 1), b"aaaa")
+        self.assertIsNone(cache.get("b", 1))
+        self.assertEqual(cache.current_bytes, 8)
+
+    def test_validator_mismatch_and_oversized(self):
+        """Test that stale validators miss and oversized files are not cached."""
+        from frappe_next_js.spa_cache import ContentCache
+
+        cache = ContentCache(max_bytes=100, max_file_bytes=5)
+        cache.put("a", ("stamp-1",), b"data")
+        self.assertIsNone(cache.get("a", ("stamp-2",)))
+        self.assertEqual(cache.current_bytes, 0)
+
+        cache.put("big", 1, b"123456")
+        self.assertIsNone(cache.get("big", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""
+Tests for the SPA file manifest
+"""
+
+import os
+import tempfile
+import unittest
+
+
+def _write(path, content="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class TestSPAManifest(unittest.TestCase):
+    """Test cases for build_manifest and the manifest file."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.www = os.path.join(self.tmp.name, "www")
+        _write(os.path.join(self.www, "frontend", "index.html"), "<html></html>")
+        _write(os.path.join(self.www, "frontend", "login", "index.html"), "<html>login</html>")
+        _write(os.path.join(self.www, "frontend", "favicon.ico"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup_files_and_directory_indexes(self):
+        """Test that files and directory indexes resolve with a single lookup."""
+        from frappe_next_js.spa_manifest import build_manifest
+
+        manifest = build_manifest("frontend", [self.www])
+        login = os.path.join(self.www, "frontend", "login", "index.html")
+
+        self.assertEqual(manifest.lookup("frontend/login").path, login)
+        self.assertEqual(manifest.lookup("frontend/login/index.html").path, login)
+        self.assertEqual(manifest.lookup("frontend").path, manifest.fallback.path)
+        self.assertEqual(manifest.lookup("frontend/favicon.ico").mimetype, "image/vnd.microsoft.icon")
+        self.assertIsNone(manifest.lookup("frontend/missing"))
+
+    def test_precompressed_variants(self):
+        """Test that .gz/.br siblings attach to their original instead of being served directly."""
+        from frappe_next_js.spa_manifest import build_manifest
+
+        _write(os.path.join(self.www, "frontend", "index.html.gz"))
+        _write(os.path.join(self.www, "frontend", "index.html.br"))
+        manifest = build_manifest("frontend", [self.www])
+
+        self.assertEqual(set(manifest.fallback.encodings), {"gzip", "br"})
+        self.assertIsNone(manifest.lookup("frontend/index.html.gz"))
+
+    def test_internal_files_are_not_served(self):
+        """Test that the export's manifests, and compressed copies of them, are never served."""
+        from pathlib import Path
+        from frappe_next_js.commands.nextjs_exporter import compress_file
+        from frappe_next_js.spa_manifest import MANIFEST_FILE, build_manifest, write_manifest_file
+
+        spa_dir = os.path.join(self.www, "frontend")
+        write_manifest_file(spa_dir, "build-1")
+        manifest_path = Path(spa_dir) / MANIFEST_FILE
+        manifest_path.write_text(manifest_path.read_text() + " " * 2048)
+        _write(str(manifest_path) + ".gz")
+
+        self.assertEqual(compress_file(manifest_path), 0)
+        self.assertFalse(os.path.exists(str(manifest_path) + ".gz"))
+
+        _write(os.path.join(spa_dir, ".env.local.gz"))
+        manifest = build_manifest("frontend", [self.www])
+        self.assertIsNone(manifest.lookup(f"frontend/{MANIFEST_FILE}.gz"))
+        self.assertIsNone(manifest.lookup("frontend/.env.local.gz"))
+
+    def test_compile_route(self):
+        """Test dynamic, catch-all and optional catch-all page patterns."""
+        from frappe_next_js.spa_manifest import compile_route
+
+        self.assertTrue(compile_route("/orders/[id]").match("/orders/123"))
+        self.assertFalse(compile_route("/orders/[id]").match("/orders/123/edit"))
+        self.assertTrue(compile_route("/docs/[...slug]").match("/docs/a/b"))
+        self.assertFalse(compile_route("/docs/[...slug]").match("/docs"))
+        self.assertTrue(compile_route("/shop/[[...slug]]").match("/shop"))
+
+    def test_route_table(self):
+        """Test that dynamic routes resolve to their prerendered shell."""
+        from frappe_next_js.spa_manifest import build_manifest, write_manifest_file
+
+        _write(os.path.join(self.www, "frontend", "orders", "_", "index.html"), "<html>order</html>")
+        routes = [{"page": "/orders/[id]", "file": "orders/_/index.html"}]
+        write_manifest_file(os.path.join(self.www, "frontend"), "build-1", routes)
+        manifest = build_manifest("frontend", [self.www])
+
+        shell = manifest.lookup("frontend/orders/_")
+        self.assertIs(manifest.match_route("frontend/orders/123"), shell)
+        self.assertIsNone(manifest.match_route("frontend/customers/123"))
+
+    def test_miss_cache(self):
+        """Test that unknown paths are resolved once per TTL and the cache stays bounded."""
+        from unittest.mock import patch
+        from frappe_next_js import spa_manifest
+
+        manifest = spa_manifest.build_manifest("frontend", [self.www])
+        with patch.object(manifest, "match_route", wraps=manifest.match_route) as match_route, patch.object(
+            spa_manifest, "MISS_CACHE_SIZE", 2
+        ):
+            for path in ("frontend/.env", "frontend/.env", "frontend/wp-admin", "frontend/a", "frontend/.env"):
+                self.assertIs(manifest.resolve(path), manifest.fallback)
+            self.assertEqual(match_route.call_count, 4)
+            self.assertEqual(list(manifest.misses), ["frontend/a", "frontend/.env"])
+
+            manifest.misses["frontend/a"] = (0, None)
+            self.assertIs(manifest.resolve("frontend/a"), manifest.fallback)
+            self.assertEqual(match_route.call_count, 5)
+
+        self.assertEqual(manifest.resolve("frontend/login").path, manifest.lookup("frontend/login").path)
+
+    def test_missing_spa_root(self):
+        """Test that a root without index.html has no manifest."""
+        from frappe_next_js.spa_manifest import build_manifest
+
+        self.assertIsNone(build_manifest("other", [self.www]))
+
+    def test_manifest_file_and_stamp(self):
+        """Test that the export-time manifest is used and the stamp detects rebuilds."""
+        from frappe_next_js.spa_manifest import build_manifest, compute_etag, write_manifest_file
+
+        spa_dir = os.path.join(self.www, "frontend")
+        write_manifest_file(spa_dir, "build-1")
+        manifest = build_manifest("frontend", [self.www])
+        login = manifest.lookup("frontend/login")
+        self.assertEqual(login.etag, compute_etag(login.path))
+
+        manifest.checked_at -= 60
+        self.assertTrue(manifest.is_current())
+
+        os.utime(os.path.join(spa_dir, ".nextjs-build"), ns=(1, 1))
+        manifest.checked_at -= 60
+        self.assertFalse(manifest.is_current())
+
+    def test_release_symlink(self):
+        """Test that entries point into the release itself and a symlink swap changes the stamp."""
+        from frappe_next_js.spa_manifest import build_manifest, write_manifest_file
+
+        releases = os.path.join(self.www, ".releases", "frontend")
+        for build_id in ("1", "2"):
+            _write(os.path.join(releases, build_id, "index.html"), f"<html>{build_id}</html>")
+            write_manifest_file(os.path.join(releases, build_id), build_id)
+        os.rename(os.path.join(self.www, "frontend"), os.path.join(self.tmp.name, "unversioned"))
+        os.symlink(os.path.join(releases, "1"), os.path.join(self.www, "frontend"))
+
+        manifest = build_manifest("frontend", [self.www])
+        self.assertEqual(manifest.fallback.path, os.path.join(os.path.realpath(releases), "1", "index.html"))
+
+        os.symlink(os.path.join(releases, "2"), os.path.join(self.www, "frontend.tmp"))
+        os.replace(os.path.join(self.www, "frontend.tmp"), os.path.join(self.www, "frontend"))
+        manifest.checked_at -= 60
+        self.assertFalse(manifest.is_current())
+
+    def test_preload_links(self):
+        """Test that recorded critical assets become the page's Link header."""
+        from frappe_next_js.spa_manifest import build_manifest, write_manifest_file
+
+        preloads = {
+            "login/index.html": [
+                {"href": "/assets/app/frontend/_next/static/css/app.css", "rel": "preload", "as": "style"},
+                {"href": "/assets/app/frontend/_next/static/chunks/main.js", "rel": "modulepreload"},
+            ]
+        }
+        write_manifest_file(os.path.join(self.www, "frontend"), "build-1", preloads=preloads)
+        manifest = build_manifest("frontend", [self.www])
+
+        self.assertEqual(
+            manifest.lookup("frontend/login").links,
+            "</assets/app/frontend/_next/static/css/app.css>; rel=preload; as=style, "
+            "</assets/app/frontend/_next/static/chunks/main.js>; rel=modulepreload",
+        )
+        self.assertIsNone(manifest.fallback.links)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Tests for the memory-mapped asset pack
+"""
+
+import os
+import tempfile
+import unittest
+
+
+class TestAssetPack(unittest.TestCase):
+    """Test cases for write_pack and packed manifest entries."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.www = os.path.join(self.tmp.name, "www")
+        self.spa_dir = os.path.join(self.www, "frontend")
+        os.makedirs(os.path.join(self.spa_dir, "login"))
+        for rel_path, content in (("index.html", b"<html>home</html>"), ("login/index.html", b"<html>login</html>")):
+            with open(os.path.join(self.spa_dir, *rel_path.split("/")), "wb") as f:
+                f.write(content)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_packed_entries(self):
+        """Test that manifest entries are served from the pack of the same build."""
+        from frappe_next_js.spa_cache import ContentCache
+        from frappe_next_js.spa_manifest import build_manifest, write_manifest_file
+        from frappe_next_js.spa_pack import write_pack
+        from frappe_next_js.spa_response import iter_file_ranges, read_file
+
+        write_pack(self.spa_dir, "build-1", ["index.html", "login/index.html"])
+        write_manifest_file(self.spa_dir, "build-1")
+        manifest = build_manifest("frontend", [self.www])
+        login = manifest.lookup("frontend/login")
+
+        self.assertIsNotNone(login.pack)
+        self.assertIsNone(manifest.lookup("frontend/.nextjs-pack"))
+        self.assertEqual(read_file(ContentCache(), login, manifest.stamp), b"<html>login</html>")
+        self.assertEqual(b"".join(iter_file_ranges(login, [(1, 5), (6, 11)])), b"htmllogin")
+
+    def test_pack_of_other_build_is_ignored(self):
+        """Test that a pack left from another build is not used."""
+        from frappe_next_js.spa_manifest import build_manifest, write_manifest_file
+        from frappe_next_js.spa_pack import write_pack
+
+        write_pack(self.spa_dir, "build-1", ["index.html"])
+        write_manifest_file(self.spa_dir, "build-2")
+
+        self.assertIsNone(build_manifest("frontend", [self.www]).fallback.pack)
+
+
+if __name__ == "__main__":
+    unittest.main()
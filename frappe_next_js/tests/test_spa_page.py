@@ -0,0 +1,236 @@
+"""
+Tests for the SPA page renderer
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+
+class TestSPAPage(unittest.TestCase):
+    """Test cases for SPAPage.render."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.www = os.path.join(self.tmp.name, "apps", "my_app", "my_app", "www")
+        os.makedirs(os.path.join(self.www, "frontend", "login"))
+        with open(os.path.join(self.www, "frontend", "index.html"), "w") as f:
+            f.write("<html>home</html>")
+        with open(os.path.join(self.www, "frontend", "login", "index.html"), "w") as f:
+            f.write("<html>login</html>")
+        with open(os.path.join(self.www, "frontend", "video.mp4"), "wb") as f:
+            f.write(bytes(range(100)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, path, headers=None, conf=None, hooks=None, environ=None, buffered=True):
+        from werkzeug.test import EnvironBuilder
+        from werkzeug.wrappers import Request
+        from frappe_next_js import spa_config, spa_page
+
+        request = Request(EnvironBuilder(path=path, headers=headers, environ_overrides=environ).get_environ())
+        local = MagicMock(request=request, site="test", sites_path=os.path.join(self.tmp.name, "sites"))
+        if hooks is None:
+            hooks = {"frontend": {"boot": False}}
+
+        def get_hooks(hook, default=None):
+            # Like frappe.get_hooks: [] for a hook no app declares, unless a default is given
+            return hooks or ([] if default is None else default)
+
+        with patch.object(spa_page, "get_www_dirs", return_value=[self.www]), patch.object(
+            spa_page.frappe, "local", local
+        ), patch.object(spa_page.frappe, "conf", conf or {}), patch.object(spa_page.frappe, "get_hooks", get_hooks):
+            spa_page._manifests.clear()
+            spa_page._routers.clear()
+            spa_config._configs.clear()
+            page = spa_page.SPAPage("frontend")
+            self.assertTrue(page.can_render())
+            response = page.render()
+            if buffered:
+                response.direct_passthrough = False
+            return response
+
+    def test_serves_directory_index_and_fallback(self):
+        """Test that routes resolve to their index.html and unknown routes to the root shell."""
+        self.assertEqual(self.render("/frontend/login/").get_data(), b"<html>login</html>")
+        self.assertEqual(self.render("/frontend/orders/123").get_data(), b"<html>home</html>")
+
+    def test_cache_control(self):
+        """Test that HTML shells revalidate and only known content-hashed paths are immutable."""
+        os.makedirs(os.path.join(self.www, "frontend", "_next", "static"))
+        os.makedirs(os.path.join(self.www, "frontend", "fonts"))
+        for name in ("_next/static/chunk.js", "report-20240101.pdf", "fonts/inter-3e2a1b4c.woff2"):
+            with open(os.path.join(self.www, "frontend", name), "w") as f:
+                f.write("")
+        immutable = "public, max-age=31536000, immutable"
+
+        self.assertEqual(self.render("/frontend/login").headers["Cache-Control"], "no-cache")
+        self.assertEqual(self.render("/frontend/_next/static/chunk.js").headers["Cache-Control"], immutable)
+        self.assertEqual(
+            self.render("/frontend/report-20240101.pdf").headers["Cache-Control"], "public, max-age=3600"
+        )
+        self.assertEqual(
+            self.render("/frontend/fonts/inter-3e2a1b4c.woff2").headers["Cache-Control"], "public, max-age=3600"
+        )
+
+        hooks = {"frontend": {"boot": False, "immutable_patterns": [r"^fonts/"]}}
+        self.assertEqual(
+            self.render("/frontend/fonts/inter-3e2a1b4c.woff2", hooks=hooks).headers["Cache-Control"], immutable
+        )
+        self.assertEqual(self.render("/frontend/_next/static/chunk.js", hooks=hooks).headers["Cache-Control"], immutable)
+
+    def test_boot_data_injection(self):
+        """Test that HTML shells get the session's boot script spliced in right after <head>."""
+        from frappe_next_js import spa_boot
+
+        with open(os.path.join(self.www, "frontend", "index.html"), "w") as f:
+            f.write("<html><head><title>x</title></head><body></body></html>")
+
+        boot = {"user": "jane@example.com", "csrf_token": "abc", "roles": ["Guest"], "lang": "en"}
+        with patch.object(spa_boot, "get_boot_data", return_value=boot):
+            response = self.render("/frontend/orders/123", hooks={"frontend": {}})
+            self.assertEqual(
+                response.get_data(),
+                b'<html><head><script>window.__FRAPPE_BOOT__={"user":"jane@example.com",'
+                b'"csrf_token":"abc","roles":["Guest"],"lang":"en"};</script><title>x</title></head><body></body></html>',
+            )
+            self.assertEqual(int(response.headers["Content-Length"]), len(response.get_data()))
+            self.assertEqual(response.headers["Cache-Control"], "private, no-cache")
+
+            etag = response.headers["ETag"]
+            response = self.render("/frontend/", headers={"If-None-Match": etag}, hooks={"frontend": {}})
+            self.assertEqual(response.status_code, 304)
+
+        with patch.object(spa_boot, "get_boot_data", return_value=dict(boot, user="Guest")):
+            response = self.render("/frontend/", headers={"If-None-Match": etag}, hooks={"frontend": {}})
+            self.assertEqual(response.status_code, 200)
+
+    def test_without_nextjs_spas_hook(self):
+        """Test that frontends exported before the nextjs_spas hook existed are served with the defaults."""
+        from frappe_next_js import spa_boot
+        from frappe_next_js.spa_manifest import write_manifest_file
+
+        write_manifest_file(os.path.join(self.www, "frontend"), "build-1")
+        with patch.object(spa_boot, "get_boot_data", return_value={"user": "Guest"}):
+            response = self.render("/frontend/login", hooks={})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"<html>login</html>", response.get_data())
+
+    def test_guest_boot_data_is_stable(self):
+        """Test that guests get no CSRF token, which Frappe would mint anew on every request."""
+        import sys
+        from frappe_next_js import spa_boot
+
+        sessions = MagicMock()
+        sessions.get_csrf_token.side_effect = ["token-1", "token-2", "token-3"]
+        with patch.dict(sys.modules, {"frappe.sessions": sessions}), patch.object(
+            spa_boot.frappe, "session", MagicMock(user="Guest"), create=True
+        ), patch.object(spa_boot.frappe, "db", MagicMock(), create=True), patch.object(
+            spa_boot.frappe, "get_roles", return_value=["Guest"], create=True
+        ), patch.object(spa_boot.frappe, "local", MagicMock(lang="en")):
+            self.assertEqual(spa_boot.get_boot_data(), spa_boot.get_boot_data())
+            self.assertIsNone(spa_boot.get_boot_data()["csrf_token"])
+            sessions.get_csrf_token.assert_not_called()
+
+            spa_boot.frappe.session.user = "jane@example.com"
+            self.assertEqual(spa_boot.get_boot_data()["csrf_token"], "token-1")
+
+    def test_boot_script_escaping(self):
+        """Test that payload values cannot close the script element."""
+        from frappe_next_js.spa_boot import render_boot_script
+
+        script = render_boot_script({"user": "</script><script>alert(1)</script>"})
+        self.assertEqual(script.count(b"</script>"), 1)
+
+    def test_preload_links_and_early_hints(self):
+        """Test that HTML responses carry Link preloads, sent early when the server supports it."""
+        from frappe_next_js.spa_manifest import write_manifest_file
+
+        preloads = {"login/index.html": [{"href": "/a.css", "rel": "preload", "as": "style"}]}
+        write_manifest_file(os.path.join(self.www, "frontend"), "build-1", preloads=preloads)
+        early_hints = MagicMock()
+        hooks = {"frontend": {"boot": False, "early_hints": True}}
+
+        response = self.render("/frontend/login", hooks=hooks, environ={"wsgi.early_hints": early_hints})
+        self.assertEqual(response.headers["Link"], "</a.css>; rel=preload; as=style")
+        early_hints.assert_called_once_with([("Link", "</a.css>; rel=preload; as=style")])
+        self.assertNotIn("Link", self.render("/frontend/").headers)
+
+    def test_non_spa_path(self):
+        """Test that paths outside a mount point are not claimed, even with a shared prefix."""
+        from werkzeug.test import EnvironBuilder
+        from werkzeug.wrappers import Request
+        from frappe_next_js import spa_page
+
+        for path in ("/about", "/frontend-old/page"):
+            request = Request(EnvironBuilder(path=path).get_environ())
+            with patch.object(spa_page.frappe, "local", MagicMock(request=request, site="test")), patch.object(
+                spa_page.frappe, "get_hooks", return_value={"frontend": {}}
+            ), patch.object(spa_page, "get_www_dirs", return_value=[]):
+                spa_page._routers.clear()
+                self.assertFalse(spa_page.SPAPage(path.strip("/")).can_render())
+
+    def test_conditional_request(self):
+        """Test that a matching If-None-Match returns 304 without a body."""
+        etag = self.render("/frontend/login").headers["ETag"]
+        response = self.render("/frontend/login", headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since at or after Last-Modified returns 304, and an older date the file."""
+        last_modified = self.render("/frontend/login").headers["Last-Modified"]
+        response = self.render("/frontend/login", headers={"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+
+        response = self.render("/frontend/login", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(), b"<html>login</html>")
+
+    def test_streams_large_files(self):
+        """Test that files over nextjs_cache_max_file_bytes are streamed with an explicit length."""
+        response = self.render(
+            "/frontend/video.mp4", conf={"nextjs_cache_max_file_bytes": 10}, buffered=False
+        )
+
+        self.assertTrue(response.direct_passthrough)
+        self.assertEqual(int(response.headers["Content-Length"]), 100)
+        body = b"".join(response.response)
+        response.close()
+        self.assertEqual(body, bytes(range(100)))
+
+    def test_single_range(self):
+        """Test that a byte range returns 206 with only the requested bytes."""
+        response = self.render("/frontend/video.mp4", headers={"Range": "bytes=10-19"})
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers["Content-Range"], "bytes 10-19/100")
+        self.assertEqual(response.get_data(), bytes(range(10, 20)))
+
+    def test_multiple_and_unsatisfiable_ranges(self):
+        """Test multipart/byteranges responses and 416 for ranges past the end."""
+        response = self.render("/frontend/video.mp4", headers={"Range": "bytes=0-1,-2"})
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.content_type.startswith("multipart/byteranges"))
+        self.assertEqual(int(response.headers["Content-Length"]), len(response.get_data()))
+        self.assertIn(b"Content-Range: bytes 98-99/100", response.get_data())
+
+        response = self.render("/frontend/video.mp4", headers={"Range": "bytes=200-"})
+        self.assertEqual(response.status_code, 416)
+
+    def test_accel_redirect_offload(self):
+        """Test that offload mode returns an internal redirect instead of the file body."""
+        response = self.render("/frontend/login", conf={"nextjs_sendfile": "x-accel-redirect"})
+
+        self.assertEqual(
+            response.headers["X-Accel-Redirect"], "/nextjs-internal/my_app/my_app/www/frontend/login/index.html"
+        )
+        self.assertEqual(response.get_data(), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+"""
+Tests for SPA mount point matching
+"""
+
+import unittest
+
+
+class TestSPARouter(unittest.TestCase):
+    """Test cases for SPARouter."""
+
+    def test_longest_prefix_match(self):
+        """Test that nested mount points win over their parents and prefixes must be whole segments."""
+        from frappe_next_js.spa_router import SPARouter
+
+        router = SPARouter(["frontend", "portal", "portal/app"])
+
+        self.assertEqual(router.match("frontend/orders/1"), "frontend")
+        self.assertEqual(router.match("portal/app/settings"), "portal/app")
+        self.assertEqual(router.match("portal/about"), "portal")
+        self.assertIsNone(router.match("frontend-old/page"))
+        self.assertIsNone(router.match("about"))
+
+
+if __name__ == "__main__":
+    unittest.main()
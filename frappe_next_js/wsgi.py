@@ -0,0 +1,12 @@
+"""WSGI application with the SPA fast path in front of Frappe.
+
+Point gunicorn at this instead of frappe.app:application (e.g. in config/supervisor.conf):
+
+	gunicorn ... frappe_next_js.wsgi:application
+"""
+
+import frappe.app
+
+from frappe_next_js.middleware import SPAStaticMiddleware
+
+application = SPAStaticMiddleware(frappe.app.application)